@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -7,12 +7,76 @@ from dotenv import load_dotenv
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./feedback.db")
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
-)
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+def _engine_kwargs() -> dict:
+    """Pool settings from the environment. SQLite keeps SQLAlchemy's defaults."""
+    if IS_SQLITE:
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", "true"),
+    }
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    # WAL lets readers proceed during a write; NORMAL sync is safe with WAL.
+    # busy_timeout waits for a lock instead of failing with "database is locked".
+    cur = dbapi_conn.cursor()
+    if _env_bool("SQLITE_WAL", "true") and ":memory:" not in SQLALCHEMY_DATABASE_URL:
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute(f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+    cur.close()
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_kwargs())
+if IS_SQLITE:
+    event.listen(engine, "connect", _sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Optional async engine (DB_ASYNC=true). Needs aiosqlite or asyncpg.
+DB_ASYNC = _env_bool("DB_ASYNC", "false")
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def async_database_url(url: str = SQLALCHEMY_DATABASE_URL) -> str:
+    explicit = os.getenv("ASYNC_DATABASE_URL")
+    if explicit:
+        return explicit
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+async_engine = None
+AsyncSessionLocal = None
+
+def init_async_engine():
+    """Create the async engine on first use, so the drivers stay optional."""
+    global async_engine, AsyncSessionLocal
+    if async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        async_engine = create_async_engine(async_database_url(), **_engine_kwargs())
+        if IS_SQLITE:
+            event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return async_engine
+
+async def get_async_db():
+    init_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
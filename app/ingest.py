@@ -0,0 +1,195 @@
+"""
+Bulk-load historical feedback from CSV or JSONL.
+
+    python -m app.ingest archive.jsonl
+    python -m app.ingest emails.csv --chunk-size 10000 --workers 8
+    python -m app.ingest emails.csv --checkpoint emails.ckpt   # resumable
+    python -m app.ingest emails.csv --offset 250000 --dry-run
+
+Records need ``parent_name``, ``parent_email`` and ``message``;
+``student_id``, ``channel`` and ``created_at`` (ISO 8601) are optional.
+Each chunk is classified with run_agent_batch (process pool), inserted
+with one executemany and committed together with its analytics rollups.
+"""
+from __future__ import annotations
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from . import models
+from .database import SessionLocal, engine
+from .migrations import upgrade
+from .services import analytics, clustering, departments, rules_store
+from .services.routing_agent import BATCH_WORKERS, run_agent_batch
+
+REQUIRED = ("parent_name", "parent_email", "message")
+
+def read_records(path: Path, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream records from a CSV or JSONL file without loading it whole."""
+    fmt = fmt or ("csv" if path.suffix.lower() == ".csv" else "jsonl")
+    with path.open(newline="", encoding="utf-8") as fh:
+        if fmt == "csv":
+            yield from csv.DictReader(fh)
+        else:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+def _timestamp(value: Any) -> datetime:
+    if not value:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+def _prepare(records: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Normalise a chunk; returns (valid payloads, skipped count)."""
+    out, skipped = [], 0
+    for rec in records:
+        if any(not str(rec.get(k) or "").strip() for k in REQUIRED):
+            skipped += 1
+            continue
+        try:
+            created_at = _timestamp(rec.get("created_at"))
+        except ValueError:
+            skipped += 1
+            continue
+        out.append({
+            "parent_name": str(rec["parent_name"]).strip(),
+            "parent_email": str(rec["parent_email"]).strip(),
+            "student_id": (str(rec.get("student_id") or "").strip() or None),
+            "message": str(rec["message"]),
+            "channel": str(rec.get("channel") or "").strip() or "web",
+            "created_at": created_at,
+        })
+    return out, skipped
+
+def ingest_chunk(db: Session, payloads: List[Dict[str, Any]], workers: int, dry_run: bool = False) -> int:
+    """Classify and insert one chunk in a single transaction. Returns rows written."""
+    if not payloads:
+        return 0
+    outs = run_agent_batch(payloads, workers=workers)
+    dept_ids = {} if dry_run else departments.registry.ids_by_name(db)
+    rows = []
+    deltas: Counter = Counter()
+    for p, out in zip(payloads, outs):
+        row = {
+            **p,
+            "sentiment": out["sentiment"],
+            "sentiment_score": float(out["sentiment_score"]),
+            "sentiment_confidence": float(out["sentiment_confidence"]),
+            "category": out["category"],
+            "priority": out["priority"],
+            "department": out["department"],
+            "department_id": dept_ids.get(out["department"]),
+            "rules_version": out.get("rules_version"),
+            "status": "new",
+        }
+        rows.append(row)
+        deltas.update(analytics.deltas_for(row["created_at"], None, row))
+    if dry_run:
+        return len(rows)
+    items = [clustering.Item(r["message"], r["department"], r["created_at"]) for r in rows]
+    for row, cluster_id in zip(rows, clustering.assign_clusters(db, items)):
+        row["cluster_id"] = cluster_id
+    db.execute(insert(models.Feedback.__table__), rows)
+    analytics.apply_deltas(db, deltas)
+    db.commit()
+    return len(rows)
+
+def _read_checkpoint(path: Optional[Path]) -> int:
+    if path and path.exists():
+        return int(json.loads(path.read_text())["offset"])
+    return 0
+
+def _write_checkpoint(path: Optional[Path], offset: int) -> None:
+    if path:
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"offset": offset}))
+        os.replace(tmp, path)
+
+def run(
+    path: Path,
+    fmt: Optional[str] = None,
+    chunk_size: int = 5000,
+    workers: int = BATCH_WORKERS,
+    offset: Optional[int] = None,
+    checkpoint: Optional[Path] = None,
+    dry_run: bool = False,
+    log=print,
+) -> Dict[str, Any]:
+    """
+    Ingest ``path`` starting at record ``offset`` (default: the checkpoint,
+    else 0). The checkpoint is advanced only after a chunk commits, so a
+    crashed run resumes without duplicates.
+    """
+    start_at = _read_checkpoint(checkpoint) if offset is None else offset
+    if not dry_run:
+        upgrade(engine)
+        with SessionLocal() as db:
+            departments.registry.seed_defaults(db)
+            rules_store.seed_defaults(db)
+            rules_store.refresh(db)
+    records = islice(read_records(path, fmt), start_at, None)
+    position, written, skipped = start_at, 0, 0
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            payloads, bad = _prepare(chunk)
+            written += ingest_chunk(db, payloads, workers, dry_run)
+            skipped += bad
+            position += len(chunk)
+            if not dry_run:
+                _write_checkpoint(checkpoint, position)
+            elapsed = time.perf_counter() - started
+            log(f"offset={position} written={written} skipped={skipped} rows/s={written / elapsed:,.0f}")
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+    return {
+        "offset": position,
+        "written": written,
+        "skipped": skipped,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(written / elapsed, 1) if elapsed else 0.0,
+        "dry_run": dry_run,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.ingest", description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--offset", type=int, help="records to skip (overrides the checkpoint)")
+    parser.add_argument("--checkpoint", type=Path, help="file recording the committed offset")
+    parser.add_argument("--dry-run", action="store_true", help="classify only, write nothing")
+    args = parser.parse_args(argv)
+
+    from .services.routing_agent import shutdown_pool
+    try:
+        summary = run(
+            args.path, args.format, args.chunk_size, args.workers,
+            args.offset, args.checkpoint, args.dry_run, log=lambda m: print(m, file=sys.stderr),
+        )
+    finally:
+        shutdown_pool()
+    print(json.dumps(summary))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,12 +1,21 @@
+import json
 import os
 from datetime import datetime
-from fastapi import FastAPI, Request, Form, Depends, HTTPException
+from urllib.parse import urlencode
+from fastapi import FastAPI, Request, Form, Depends, HTTPException, Query
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from .database import Base, engine, SessionLocal
+from fastapi.responses import HTMLResponse, PlainTextResponse, RedirectResponse, StreamingResponse
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, select_autoescape
+from .database import engine, SessionLocal, get_db, DB_ASYNC
+from .migrations import upgrade
+from .services import events, http_cache, metrics, pagination, reclassify, rules_store
 from .models import Feedback, Department
 from .routers import feedback as feedback_router
+from .routers import analytics as analytics_router
+from .routers import clusters as clusters_router
+from .routers import reclassify as reclassify_router
+from .routers import rules as rules_router
+from .services.departments import registry as department_registry
 from .schemas import FeedbackCreate
 from sqlalchemy.orm import Session
 from sqlalchemy import select
@@ -14,30 +23,44 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-Base.metadata.create_all(bind=engine)
-
 app = FastAPI(title=os.getenv("APP_NAME", "Parent–University Engagement"))
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 # Mount static files
 static_dir = os.path.join(os.path.dirname(__file__), "static")
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
 # Templates
+class TimedTemplate(Template):
+    def render(self, *args, **kwargs):
+        started = metrics.clock()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            metrics.RENDER_SECONDS.observe(metrics.clock() - started, self.name or "<string>")
+
+# Compiled templates are kept in memory and as bytecode on disk (shared by
+# workers and restarts); set TEMPLATE_AUTO_RELOAD=true while editing them.
 templates_dir = os.path.join(os.path.dirname(__file__), "templates")
 jinja_env = Environment(
     loader=FileSystemLoader(templates_dir),
     autoescape=select_autoescape(["html", "xml"]),
+    auto_reload=os.getenv("TEMPLATE_AUTO_RELOAD", "false").lower() == "true",
+    bytecode_cache=FileSystemBytecodeCache(os.getenv("TEMPLATE_CACHE_DIR") or None),
 )
+if metrics.ENABLED:
+    jinja_env.template_class = TimedTemplate
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-# Include API router
+# Include API router (async variants first so they take precedence)
+if DB_ASYNC:
+    from .routers import feedback_async as feedback_async_router
+    app.include_router(feedback_async_router.router)
 app.include_router(feedback_router.router)
+app.include_router(analytics_router.router)
+app.include_router(clusters_router.router)
+app.include_router(rules_router.router)
+app.include_router(reclassify_router.router)
 
 # Template context processor
 def get_template_context(request: Request, **additional_context):
@@ -51,30 +74,73 @@ def get_template_context(request: Request, **additional_context):
 # ✅ Startup event to auto-seed departments
 @app.on_event("startup")
 def startup_event():
-    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
     db = SessionLocal()
     try:
-        if db.query(Department).count() == 0:
-            default_departments = [
-                "Hostel", "Academics", "Finance", "Transport",
-                "Health", "Counselling", "IT Support", "Student Affairs"
-            ]
-            for name in default_departments:
-                db.add(Department(name=name))
-            db.commit()
+        department_registry.seed_defaults(db)
     except Exception as e:
         db.rollback()
         print(f"❌ Error seeding departments: {e}")
     finally:
         db.close()
 
+    db = SessionLocal()
+    try:
+        department_registry.load(db)
+    finally:
+        db.close()
+
+    # Routing rules: the latest stored version now, newer ones as published
+    db = SessionLocal()
+    try:
+        rules_store.seed_defaults(db)
+        rules_store.refresh(db)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error loading routing rules: {e}")
+    finally:
+        db.close()
+    rules_store.start_watcher()
+
+    from .services import analysis_queue
+    if analysis_queue.DEFERRED_ANALYSIS:
+        analysis_queue.start_worker()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    from .services import analysis_queue
+    from .services.routing_agent import shutdown_pool
+    analysis_queue.stop_worker()
+    rules_store.stop_watcher()
+    reclassify.shutdown()
+    shutdown_pool()
+    events.shutdown()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    from . import database
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+
 # ---------------- ROUTES ---------------- #
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics_endpoint():
+    """Prometheus scrape target (this process only); 404 with METRICS_ENABLED=false."""
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# The landing page only changes with the footer year
+_index_html: dict[int, str] = {}
+
 @app.get("/", response_class=HTMLResponse)
 def index(request: Request):
-    template = jinja_env.get_template("index.html")
     context = get_template_context(request, title="Submit Feedback", result=None)
-    html = template.render(**context)
+    html = _index_html.get(context["year"])
+    if html is None:
+        template = jinja_env.get_template("index.html")
+        html = _index_html[context["year"]] = template.render(**context)
     return HTMLResponse(html)
 
 @app.post("/submit", response_class=HTMLResponse)
@@ -115,23 +181,40 @@ def submit_feedback(
     html = template.render(**context)
     return HTMLResponse(html)
 
+ADMIN_PAGE_SIZE = 50
+
+def _feedback_page(db: Session, cursor: str | None, limit: int, **filters):
+    try:
+        return pagination.feedback_page(db, cursor, limit, **filters)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _query_string(**params) -> str:
+    return urlencode({k: v for k, v in params.items() if v})
+
+def _fragment(template_name: str, next_cursor: str | None, validators, **context) -> HTMLResponse:
+    html = jinja_env.get_template(template_name).render(**context)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return http_cache.apply(HTMLResponse(html, headers=headers), validators)
+
 @app.get("/feedback", response_class=HTMLResponse)
 def admin_feedback(
     request: Request,
     department: str | None = None,
     sentiment: str | None = None,
     status: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1, le=pagination.MAX_LIMIT),
     db: Session = Depends(get_db)
 ):
-    departments = db.execute(select(Department).order_by(Department.name.asc())).scalars().all()
-    q = db.query(Feedback)
-    if department:
-        q = q.filter(Feedback.department == department)
-    if sentiment:
-        q = q.filter(Feedback.sentiment == sentiment)
-    if status:
-        q = q.filter(Feedback.status == status)
-    items = q.order_by(Feedback.created_at.desc()).all()
+    filters = {"department": department, "sentiment": sentiment, "status": status}
+    validators = http_cache.feedback_validators(db, request.url.query)
+    cached = http_cache.not_modified(request, validators)
+    if cached is not None:
+        return cached
+    departments = department_registry.ordered(db)
+    items, next_cursor = _feedback_page(db, cursor, limit, **filters)
+    total = pagination.count_feedback(db, **filters)
     
     template = jinja_env.get_template("feedback_list.html")
     context = get_template_context(
@@ -139,26 +222,123 @@ def admin_feedback(
         title="Feedback Admin",
         departments=departments,
         feedback=items,
+        total=total,
+        next_url=f"/feedback/rows?{_query_string(**filters, limit=limit, cursor=next_cursor)}" if next_cursor else None,
+        export_query=_query_string(format="csv", **filters),
     )
     html = template.render(**context)
-    return HTMLResponse(html)
+    return http_cache.apply(HTMLResponse(html), validators)
+
+@app.get("/feedback/rows", response_class=HTMLResponse)
+def admin_feedback_rows(
+    request: Request,
+    department: str | None = None,
+    sentiment: str | None = None,
+    status: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1, le=pagination.MAX_LIMIT),
+    db: Session = Depends(get_db)
+):
+    """Table-row fragment for "Load more"; next cursor in X-Next-Cursor."""
+    validators = http_cache.feedback_validators(db, request.url.query)
+    cached = http_cache.not_modified(request, validators)
+    if cached is not None:
+        return cached
+    items, next_cursor = _feedback_page(
+        db, cursor, limit, department=department, sentiment=sentiment, status=status
+    )
+    return _fragment("_feedback_rows.html", next_cursor, validators, feedback=items)
 
 # ✅ Department card view
 @app.get("/feedback/department/{dept_id}", response_class=HTMLResponse)
-def department_feedback(request: Request, dept_id: int, db: Session = Depends(get_db)):
-    department = db.query(Department).filter(Department.id == dept_id).first()
+def department_feedback(
+    request: Request,
+    dept_id: int,
+    cursor: str | None = None,
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1, le=pagination.MAX_LIMIT),
+    db: Session = Depends(get_db)
+):
+    department = department_registry.get(dept_id, db)
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
-    assignments = db.query(Feedback).filter(Feedback.department == department.name).all()
+    validators = http_cache.feedback_validators(db, dept_id, request.url.query)
+    cached = http_cache.not_modified(request, validators)
+    if cached is not None:
+        return cached
+    assignments, next_cursor = _feedback_page(db, cursor, limit, department=department.name)
     template = jinja_env.get_template("department_cards.html")
     context = get_template_context(
         request,
         title=f"{department.name} Assignments",
         department=department,
-        assignments=assignments
+        assignments=assignments,
+        total=pagination.count_feedback(db, department=department.name),
+        next_url=(
+            f"/feedback/department/{dept_id}/cards?{_query_string(limit=limit, cursor=next_cursor)}"
+            if next_cursor else None
+        ),
     )
     html = template.render(**context)
-    return HTMLResponse(html)
+    return http_cache.apply(HTMLResponse(html), validators)
+
+@app.get("/feedback/department/{dept_id}/cards", response_class=HTMLResponse)
+def department_feedback_cards(
+    request: Request,
+    dept_id: int,
+    cursor: str | None = None,
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1, le=pagination.MAX_LIMIT),
+    db: Session = Depends(get_db)
+):
+    """Card fragment for "Load more" on the department view."""
+    department = department_registry.get(dept_id, db)
+    if not department:
+        raise HTTPException(status_code=404, detail="Department not found")
+    validators = http_cache.feedback_validators(db, dept_id, request.url.query)
+    cached = http_cache.not_modified(request, validators)
+    if cached is not None:
+        return cached
+    assignments, next_cursor = _feedback_page(db, cursor, limit, department=department.name)
+    return _fragment("_department_cards.html", next_cursor, validators, assignments=assignments)
+
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+
+def _sse(event: str, data: str) -> str:
+    lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+    return f"event: {event}\n{lines}\n"
+
+def _render_event(event: dict) -> str:
+    if event["type"] == "created":
+        html = jinja_env.get_template("_department_cards.html").render(assignments=[event["feedback"]])
+        return _sse("created", html)
+    if event["type"] == "status":
+        return _sse("status", json.dumps({"ids": event["ids"], "status": event["status"]}))
+    return _sse("reset", "")
+
+@app.get("/feedback/department/{dept_id}/events")
+async def department_feedback_events(dept_id: int, db: Session = Depends(get_db)):
+    """
+    Server-Sent Events for the department view: ``created`` carries the
+    rendered card, ``status`` the ids and their new status, and ``reset``
+    asks the page to reload after it fell behind.
+    """
+    department = department_registry.get(dept_id, db)
+    if not department:
+        raise HTTPException(status_code=404, detail="Department not found")
+    db.close()
+
+    async def stream():
+        with events.broker().subscribe(department.name) as sub:
+            yield "retry: 3000\n\n"
+            while True:
+                event = await sub.get(EVENTS_KEEPALIVE_SECONDS)
+                # a comment line keeps proxies from closing an idle stream
+                yield ": ping\n\n" if event is None else _render_event(event)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # ✅ Update feedback status
 @app.post("/feedback/{fb_id}/status")
@@ -167,11 +347,11 @@ def update_feedback_status(
     status: str = Form(...),
     db: Session = Depends(get_db)
 ):
-    feedback = db.query(Feedback).filter(Feedback.id == fb_id).first()
-    if not feedback:
+    from .services.feedback_service import update_status_service
+
+    updated, _ = update_status_service(db, status, ids=[fb_id])
+    if not updated and db.get(Feedback, fb_id) is None:
         raise HTTPException(status_code=404, detail="Feedback not found")
-    feedback.status = status
-    db.commit()
     return HTMLResponse(f"""
         <script>
         alert("Status updated to {status}");
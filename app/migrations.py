@@ -0,0 +1,67 @@
+"""
+Schema upgrades for databases created before a table gained new indexes
+or columns. ``create_all`` only creates missing tables, so nullable
+columns and indexes declared on an existing table are added here. Every
+step is idempotent.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from .database import Base
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+
+def ensure_columns(engine: Engine) -> list[str]:
+    """Add any declared column missing from an existing table (as a plain
+    nullable column, without constraints); returns "table.column" names."""
+    added = []
+    insp = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        existing = {c["name"] for c in insp.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                with engine.begin() as conn:
+                    conn.exec_driver_sql(ddl)
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+def ensure_indexes(engine: Engine) -> list[str]:
+    """Create any declared index that is missing; returns the names created."""
+    created = []
+    insp = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in insp.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                created.append(index.name)
+    return created
+
+def upgrade(engine: Engine) -> None:
+    new_rollups = not inspect(engine).has_table(models.FeedbackRollup.__tablename__)
+    Base.metadata.create_all(bind=engine)
+    ensure_columns(engine)
+    ensure_indexes(engine)
+    from .services import search
+    search.ensure_index(engine)
+    if new_rollups:
+        # Backfill counts for feedback stored before rollups existed
+        from sqlalchemy.orm import Session
+        from .services import analytics
+        with Session(engine) as db:
+            analytics.rebuild(db)
+
+if __name__ == "__main__":
+    import sys
+    from .database import engine
+    upgrade(engine)
+    if "--backfill-clusters" in sys.argv[1:]:
+        # Group feedback stored before near-duplicate clustering existed
+        from sqlalchemy.orm import Session
+        from .services import clustering
+        with Session(engine) as db:
+            clustering.backfill(db)
+    print("Schema up to date")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, ForeignKey, Float, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -30,6 +30,9 @@ class Feedback(Base):
     priority = Column(String, default="low")
     department = Column(String, default="Student Affairs")
     department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
+    cluster_id = Column(Integer, ForeignKey("feedback_clusters.id"), index=True, nullable=True)
+    # rule_sets.id the row was classified with; NULL for the built-in rules
+    rules_version = Column(Integer, index=True, nullable=True)
     
     # Status tracking
     status = Column(String, default="new")
@@ -37,4 +40,85 @@ class Feedback(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    department_rel = relationship("Department", back_populates="feedback")
\ No newline at end of file
+    department_rel = relationship("Department", back_populates="feedback")
+
+    # created_at is read back on flush (RETURNING) for analytics rollups
+    __mapper_args__ = {"eager_defaults": True}
+
+    # Match the listing access paths: optional equality filters on
+    # department/status/sentiment, newest first on (created_at, id).
+    __table_args__ = (
+        Index("ix_feedback_created_id", "created_at", "id"),
+        Index("ix_feedback_dept_status_created", "department", "status", "created_at", "id"),
+        Index("ix_feedback_status_created", "status", "created_at", "id"),
+        Index("ix_feedback_sentiment_created", "sentiment", "created_at", "id"),
+        # newest change, for the admin views' conditional GET
+        Index("ix_feedback_updated_at", "updated_at"),
+    )
+
+class FeedbackRollup(Base):
+    """Feedback counts per time bucket and dimension value, kept in step with writes."""
+    __tablename__ = "feedback_rollups"
+
+    id = Column(Integer, primary_key=True)
+    bucket = Column(String, nullable=False)          # "day" | "week"
+    bucket_start = Column(Date, nullable=False)
+    dimension = Column(String, nullable=False)       # category, department, sentiment, priority, status
+    value = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("bucket", "bucket_start", "dimension", "value", name="uq_feedback_rollups_key"),
+    )
+
+class FeedbackCluster(Base):
+    """Near-duplicate messages grouped under their first message's MinHash signature."""
+    __tablename__ = "feedback_clusters"
+
+    id = Column(Integer, primary_key=True)
+    size = Column(Integer, nullable=False, default=0)
+    department = Column(String, nullable=True)
+    sample_message = Column(Text)
+    signature = Column(Text, nullable=False)
+    first_seen_at = Column(DateTime(timezone=True))
+    last_seen_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_feedback_clusters_dept_size", "department", "size"),
+        Index("ix_feedback_clusters_size", "size"),
+    )
+
+class FeedbackClusterBand(Base):
+    """LSH band keys of each cluster's signature; looked up by band_key."""
+    __tablename__ = "feedback_cluster_bands"
+
+    id = Column(Integer, primary_key=True)
+    band_key = Column(String, nullable=False, index=True)
+    cluster_id = Column(Integer, ForeignKey("feedback_clusters.id"), nullable=False)
+
+class RuleSetVersion(Base):
+    """One published version of the routing rules; the highest id is in effect."""
+    __tablename__ = "rule_sets"
+
+    id = Column(Integer, primary_key=True)      # the rules version
+    rules = Column(Text, nullable=False)        # JSON, in rules.validate's form
+    checksum = Column(String, nullable=False)
+    note = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ReclassifyJob(Base):
+    """A reclassification run over feedback ids up to max_id; resumes after last_id."""
+    __tablename__ = "reclassify_jobs"
+
+    id = Column(Integer, primary_key=True)
+    scope = Column(String, nullable=False)            # "all" | "stale"
+    status = Column(String, nullable=False)           # running, paused, failed, done
+    chunk_size = Column(Integer, nullable=False)
+    max_id = Column(Integer, nullable=False)
+    last_id = Column(Integer, nullable=False, default=0)
+    scanned = Column(Integer, nullable=False, default=0)
+    changed = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())   # last checkpoint
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,25 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..services import analytics
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+@router.get("/summary")
+def analytics_summary(
+    bucket: str = Query("day", pattern="^(day|week)$"),
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    dimensions: Optional[str] = Query(None, description="Comma-separated subset of category,department,sentiment,priority,status"),
+    db: Session = Depends(get_db),
+):
+    """Feedback counts per day or week (by created_at), read from the rollup table."""
+    dims = None
+    if dimensions:
+        dims = [d.strip() for d in dimensions.split(",") if d.strip()]
+        unknown = [d for d in dims if d not in analytics.DIMENSIONS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown dimensions: {', '.join(unknown)}")
+    return analytics.summary(db, bucket=bucket, since=since, until=until, dimensions=dims)
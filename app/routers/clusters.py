@@ -0,0 +1,28 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from ..database import get_db
+from .. import models, schemas
+from ..services import clustering, pagination
+
+router = APIRouter(prefix="/api/clusters", tags=["clusters"])
+
+@router.get("", response_model=List[schemas.ClusterOut])
+def list_clusters(
+    department: Optional[str] = None,
+    min_size: int = Query(2, ge=1),
+    limit: int = Query(50, ge=1, le=pagination.MAX_LIMIT),
+    db: Session = Depends(get_db),
+):
+    """
+    Groups of near-duplicate feedback, largest first. Members are listed by
+    `GET /api/feedback?cluster_id=<id>`.
+    """
+    return clustering.list_clusters(db, department=department, min_size=min_size, limit=limit)
+
+@router.get("/{cluster_id}", response_model=schemas.ClusterOut)
+def get_cluster(cluster_id: int, db: Session = Depends(get_db)):
+    cluster = db.get(models.FeedbackCluster, cluster_id)
+    if cluster is None:
+        raise HTTPException(status_code=404, detail="Cluster not found")
+    return cluster
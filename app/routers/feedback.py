@@ -1,38 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+import os
+from datetime import datetime, timezone
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ..database import SessionLocal
+from ..database import get_db
 from .. import models, schemas
-from ..services.feedback_service import create_feedback_service
+from ..services import analysis_queue, departments, export, nlp_cache, pagination, search
+from ..services.feedback_service import (
+    STATUS_FILTERS, create_feedback_service, create_feedback_batch_service, update_status_service,
+)
 
 router = APIRouter(prefix="/api", tags=["feedback"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/departments", response_model=List[schemas.DepartmentOut])
 def list_departments(db: Session = Depends(get_db)):
-    return db.query(models.Department).order_by(models.Department.name.asc()).all()
+    return departments.registry.ordered(db)
+
+@router.get("/analysis/queue")
+def analysis_queue_stats(db: Session = Depends(get_db)):
+    """Deferred-analysis backlog: depth, lag of the oldest pending row, worker counters."""
+    return analysis_queue.queue_stats(db)
+
+@router.get("/analysis/cache")
+def analysis_cache_stats():
+    """Hit/miss/eviction counters of the sentiment and category caches."""
+    return nlp_cache.cache_stats()
 
 @router.get("/feedback", response_model=List[schemas.FeedbackOut])
 def list_feedback(
+    response: Response,
+    department: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    status: Optional[str] = None,
+    cluster_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    fields: Optional[str] = Query(None, description="Comma-separated FeedbackOut fields to return"),
+    db: Session = Depends(get_db),
+):
+    """
+    Newest first, `limit` rows per page. The next page's cursor is returned
+    in the `X-Next-Cursor` header (absent on the last page).
+    """
+    selected = parse_fields(fields)
+    try:
+        rows, next_cursor = pagination.feedback_page(
+            db, cursor, limit, selected,
+            department=department, sentiment=sentiment, status=status, cluster_id=cluster_id,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return listing_response(response, rows, next_cursor, selected)
+
+@router.get("/feedback/search", response_model=List[schemas.FeedbackOut])
+def search_feedback(
+    response: Response,
+    q: str = Query(..., min_length=1, description="Words that must all appear; end a word with * to match a prefix"),
     department: Optional[str] = None,
     sentiment: Optional[str] = None,
     status: Optional[str] = None,
+    cluster_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    fields: Optional[str] = Query(None, description="Comma-separated FeedbackOut fields to return"),
     db: Session = Depends(get_db),
 ):
-    q = db.query(models.Feedback)
-    if department:
-        q = q.filter(models.Feedback.department == department)
-    if sentiment:
-        q = q.filter(models.Feedback.sentiment == sentiment)
-    if status:
-        q = q.filter(models.Feedback.status == status)
-    return q.order_by(models.Feedback.created_at.desc()).all()
+    """
+    Messages matching `q`, best match first, combinable with the listing
+    filters. Paged like `/api/feedback` through `X-Next-Cursor`.
+    """
+    selected = parse_fields(fields)
+    if not search.parse_terms(q):
+        raise HTTPException(status_code=400, detail="Query has no searchable words")
+    try:
+        rows, next_cursor = search.search_page(
+            db, q, cursor, limit, selected,
+            department=department, sentiment=sentiment, status=status, cluster_id=cluster_id,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return listing_response(response, rows, next_cursor, selected)
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in schemas.FeedbackOut.model_fields]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown) or fields}")
+    return selected
+
+def listing_response(response: Response, rows, next_cursor: Optional[str], selected: Optional[List[str]]):
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if selected is None:
+        response.headers.update(headers)
+        return rows
+    items = [{f: getattr(r, f) for f in selected} for r in rows]
+    return JSONResponse(jsonable_encoder(items), headers=headers)
+
+@router.get("/feedback/export")
+def export_feedback(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    department: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="Only rows created or updated at/after this time (UTC)"),
+):
+    """
+    Stream every matching row as NDJSON or CSV in id order. Pass the
+    `X-Export-Watermark` header of one export as `since` on the next.
+    """
+    filters = {"department": department, "sentiment": sentiment, "status": status}
+    watermark = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    if format == "csv":
+        body, media_type = export.iter_csv(filters, since), "text/csv"
+    else:
+        body, media_type = export.iter_ndjson(filters, since), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="feedback.{format}"',
+            "X-Export-Watermark": watermark.isoformat(),
+        },
+    )
 
 @router.post("/feedback", response_model=schemas.FeedbackOut)
 def create_feedback(payload: schemas.FeedbackCreate, db: Session = Depends(get_db)):
@@ -40,4 +133,33 @@ def create_feedback(payload: schemas.FeedbackCreate, db: Session = Depends(get_d
     
     payload_dict = payload.model_dump()
     fb = create_feedback_service(payload_dict, db)
-    return fb
\ No newline at end of file
+    return fb
+
+MAX_BATCH_SIZE = int(os.getenv("FEEDBACK_MAX_BATCH", "1000"))
+
+@router.post("/feedback/batch", response_model=List[schemas.FeedbackOut])
+def create_feedback_batch(
+    payloads: List[schemas.FeedbackCreate] = Body(..., max_length=MAX_BATCH_SIZE),
+    db: Session = Depends(get_db),
+):
+    return create_feedback_batch_service([p.model_dump() for p in payloads], db)
+
+@router.patch("/feedback/status", response_model=schemas.StatusUpdateOut)
+def update_feedback_status_bulk(payload: schemas.StatusUpdate, db: Session = Depends(get_db)):
+    """
+    Set `status` on the rows given by `ids` and/or `department`,
+    `category`, `cluster_id`, in one transaction. Send the time the rows
+    were read as `unmodified_since` to leave rows changed since then
+    alone; they are returned in `conflicts`.
+    """
+    filters = {f: getattr(payload, f) for f in STATUS_FILTERS}
+    if payload.ids is None and all(v is None for v in filters.values()):
+        raise HTTPException(status_code=400, detail="Give ids or at least one filter")
+    if payload.ids is not None and len(payload.ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_SIZE} ids per request")
+    if payload.status == analysis_queue.PENDING_ANALYSIS:
+        raise HTTPException(status_code=400, detail="Use the analysis queue to reclassify feedback")
+    updated, conflicts = update_status_service(
+        db, payload.status, payload.ids, payload.unmodified_since, **filters
+    )
+    return {"status": payload.status, "updated": updated, "conflicts": conflicts}
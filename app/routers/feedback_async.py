@@ -0,0 +1,47 @@
+"""
+Async variants of the hot JSON routes, mounted ahead of the sync ones
+when DB_ASYNC=true. Database work runs on the async engine, so a request
+waiting on the database does not hold a threadpool worker.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ..database import get_async_db
+from .. import schemas
+from ..services import departments, pagination
+from ..services.feedback_service import create_feedback_service_async
+from .feedback import listing_response, parse_fields
+
+router = APIRouter(prefix="/api", tags=["feedback"])
+
+@router.get("/departments", response_model=List[schemas.DepartmentOut])
+async def list_departments(db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(departments.registry.ordered)
+
+@router.get("/feedback", response_model=List[schemas.FeedbackOut])
+async def list_feedback(
+    response: Response,
+    department: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    status: Optional[str] = None,
+    cluster_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    fields: Optional[str] = Query(None, description="Comma-separated FeedbackOut fields to return"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    selected = parse_fields(fields)
+    try:
+        rows, next_cursor = await db.run_sync(
+            lambda s: pagination.feedback_page(
+                s, cursor, limit, selected,
+                department=department, sentiment=sentiment, status=status, cluster_id=cluster_id,
+            )
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return listing_response(response, rows, next_cursor, selected)
+
+@router.post("/feedback", response_model=schemas.FeedbackOut)
+async def create_feedback(payload: schemas.FeedbackCreate, db: AsyncSession = Depends(get_async_db)):
+    return await create_feedback_service_async(payload.model_dump(), db)
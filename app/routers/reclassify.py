@@ -0,0 +1,60 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from ..database import get_db
+from .. import models, schemas
+from ..services import reclassify
+
+router = APIRouter(prefix="/api/reclassify", tags=["reclassify"])
+
+def _job(db: Session, job_id: int) -> models.ReclassifyJob:
+    job = db.get(models.ReclassifyJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Reclassify job not found")
+    return job
+
+@router.post("", response_model=schemas.ReclassifyJobOut, status_code=202)
+def start_job(body: schemas.ReclassifyStart, db: Session = Depends(get_db)):
+    """
+    Re-run classification over stored feedback in the background: every row
+    (scope ``all``) or those classified under another rules version
+    (``stale``). 409 while another job is running.
+    """
+    running = reclassify.active_job(db)
+    if running is not None:
+        raise HTTPException(status_code=409, detail=f"Reclassify job {running.id} is running")
+    try:
+        job = reclassify.create(db, body.scope, body.chunk_size or reclassify.CHUNK_SIZE)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    reclassify.start_background(job.id)
+    return job
+
+@router.get("", response_model=List[schemas.ReclassifyJobOut])
+def list_jobs(limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    """Jobs, newest first."""
+    job = models.ReclassifyJob
+    return db.execute(select(job).order_by(job.id.desc()).limit(limit)).scalars().all()
+
+@router.get("/{job_id}", response_model=schemas.ReclassifyJobOut)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    """Progress: ids up to ``last_id`` of ``max_id`` are done."""
+    return _job(db, job_id)
+
+@router.post("/{job_id}/pause", response_model=schemas.ReclassifyJobOut)
+def pause_job(job_id: int, db: Session = Depends(get_db)):
+    """Stop after the current chunk; the job can be resumed later."""
+    _job(db, job_id)
+    if not reclassify.pause(db, job_id):
+        raise HTTPException(status_code=409, detail="Job is not running")
+    return _job(db, job_id)
+
+@router.post("/{job_id}/resume", response_model=schemas.ReclassifyJobOut, status_code=202)
+def resume_job(job_id: int, db: Session = Depends(get_db)):
+    """Continue a paused, failed or abandoned job from its checkpoint."""
+    _job(db, job_id)
+    if not reclassify.claim(db, job_id):
+        raise HTTPException(status_code=409, detail="Job is done or still running")
+    reclassify.start_background(job_id)
+    return _job(db, job_id)
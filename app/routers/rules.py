@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from ..database import get_db
+from .. import models, schemas
+from ..services import rules, rules_store
+
+router = APIRouter(prefix="/api/rules", tags=["rules"])
+
+def _rule_set_out(db: Session, rule_set: rules.RuleSet, **extra) -> dict:
+    row = db.get(models.RuleSetVersion, rule_set.version) if rule_set.version is not None else None
+    return {
+        "version": rule_set.version,
+        "checksum": rule_set.checksum,
+        "note": row.note if row is not None else None,
+        "created_at": row.created_at if row is not None else None,
+        **rule_set.rules,
+        **extra,
+    }
+
+@router.get("", response_model=schemas.RuleSetOut)
+def get_rules(version: int | None = None, db: Session = Depends(get_db)):
+    """The latest stored routing rules, or ``version``; the built-in rules
+    (version null) until any are stored."""
+    rule_set = rules_store.load(db, version)
+    if rule_set is None:
+        if version is not None:
+            raise HTTPException(status_code=404, detail="Rules version not found")
+        rule_set = rules.active()
+    return _rule_set_out(db, rule_set)
+
+@router.post("", response_model=schemas.RuleSetOut, status_code=201)
+def publish_rules(body: schemas.RuleSetIn, reclassify: bool = True, db: Session = Depends(get_db)):
+    """
+    Store the rules as the next version. This process switches at once,
+    the others within RULES_POLL_SECONDS. With ``reclassify`` (default),
+    a background job re-runs the rows classified under another version;
+    its id is returned as ``reclassify_job``.
+    """
+    data = body.model_dump(exclude={"note"})
+    try:
+        rule_set = rules_store.publish(db, data, body.note)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    job_id = rules_store.start_reclassify(db) if reclassify else None
+    return _rule_set_out(db, rule_set, reclassify_job=job_id)
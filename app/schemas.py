@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class DepartmentBase(BaseModel):
@@ -34,9 +34,74 @@ class FeedbackOut(FeedbackBase):
     priority: str
     department: str
     department_id: Optional[int]
+    cluster_id: Optional[int] = None
+    rules_version: Optional[int] = None
     status: str
     created_at: datetime
     updated_at: Optional[datetime]
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class StatusUpdate(BaseModel):
+    status: str
+    ids: Optional[List[int]] = None
+    department: Optional[str] = None
+    category: Optional[str] = None
+    cluster_id: Optional[int] = None
+    unmodified_since: Optional[datetime] = None
+
+class StatusUpdateOut(BaseModel):
+    status: str
+    updated: List[int]
+    conflicts: List[int]
+
+class RuleSetIn(BaseModel):
+    category_keywords: Dict[str, List[str]]
+    urgency_words: List[str]
+    pos_cues: List[str]
+    neg_cues: List[str]
+    note: Optional[str] = None
+
+class RuleSetOut(BaseModel):
+    version: Optional[int]
+    checksum: str
+    note: Optional[str] = None
+    created_at: Optional[datetime] = None
+    category_keywords: Dict[str, List[str]]
+    urgency_words: List[str]
+    pos_cues: List[str]
+    neg_cues: List[str]
+    reclassify_job: Optional[int] = None
+
+class ReclassifyStart(BaseModel):
+    scope: str = "all"
+    chunk_size: Optional[int] = None
+
+class ReclassifyJobOut(BaseModel):
+    id: int
+    scope: str
+    status: str
+    chunk_size: int
+    max_id: int
+    last_id: int
+    scanned: int
+    changed: int
+    error: Optional[str] = None
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ClusterOut(BaseModel):
+    id: int
+    size: int
+    department: Optional[str]
+    sample_message: Optional[str]
+    first_seen_at: Optional[datetime]
+    last_seen_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
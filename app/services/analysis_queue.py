@@ -0,0 +1,164 @@
+"""
+Deferred classification. With DEFERRED_ANALYSIS=true, new feedback is
+stored straight away with status ``pending_analysis``; a background
+worker classifies those rows in batches and moves them to ``new``.
+
+The feedback table itself is the queue, so pending work survives a
+restart and every process sees the same backlog.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import SessionLocal
+from . import analytics, clustering, departments, events
+from .routing_agent import run_agent_batch
+
+PENDING_ANALYSIS = "pending_analysis"
+ANALYZED_STATUS = "new"
+
+DEFERRED_ANALYSIS = os.getenv("DEFERRED_ANALYSIS", "false").lower() == "true"
+BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "200"))
+POLL_SECONDS = float(os.getenv("ANALYSIS_POLL_SECONDS", "2"))
+
+_wakeup = threading.Event()
+_stats_lock = threading.Lock()
+_stats: Dict[str, Any] = {"processed": 0, "batches": 0, "last_batch_ms": 0.0, "errors": 0}
+
+def notify() -> None:
+    """Wake the worker after enqueueing (it also polls on its own)."""
+    _wakeup.set()
+
+def process_pending(db: Session, limit: int = BATCH_SIZE) -> int:
+    """Classify up to ``limit`` pending rows, oldest first. Returns rows updated."""
+    fb = models.Feedback
+    rows = db.execute(
+        select(
+            fb.id, fb.message, fb.created_at, fb.cluster_id, fb.parent_name, fb.parent_email, fb.student_id,
+            *[getattr(fb, d) for d in analytics.DIMENSIONS],
+        )
+        .where(fb.status == PENDING_ANALYSIS)
+        .order_by(fb.created_at.asc(), fb.id.asc())
+        .limit(limit)
+    ).all()
+    if not rows:
+        return 0
+
+    started = time.perf_counter()
+    outs = run_agent_batch([{"message": r.message} for r in rows])
+    dept_ids = departments.registry.ids_by_name(db)
+    params = [
+        {
+            "_id": r.id,
+            "sentiment": out["sentiment"],
+            "sentiment_score": float(out["sentiment_score"]),
+            "sentiment_confidence": float(out["sentiment_confidence"]),
+            "category": out["category"],
+            "priority": out["priority"],
+            "department": out["department"],
+            "department_id": dept_ids.get(out["department"]),
+            "rules_version": out.get("rules_version"),
+            "status": ANALYZED_STATUS,
+        }
+        for r, out in zip(rows, outs)
+    ]
+    # Only rows still pending: another worker may have got there first
+    stmt = (
+        update(fb)
+        .where(fb.id == bindparam("_id"), fb.status == PENDING_ANALYSIS)
+        .values({k: bindparam(k) for k in params[0] if k != "_id"})
+        .execution_options(synchronize_session=False)
+    )
+    conn = db.connection()
+    if not conn.dialect.supports_sane_multi_rowcount or conn.execute(stmt, params).rowcount != len(params):
+        # Raced with another worker (or the driver cannot tell): apply row
+        # by row so only our own updates are counted in the rollups
+        db.rollback()
+        conn = db.connection()
+        params = [p for p in params if conn.execute(stmt, [p]).rowcount == 1]
+    updated = {p["_id"]: p for p in params}
+    deltas: Counter = Counter()
+    for r in rows:
+        if r.id in updated:
+            old = {d: getattr(r, d) for d in analytics.DIMENSIONS}
+            deltas.update(analytics.deltas_for(r.created_at, old, updated[r.id]))
+    analytics.apply_deltas(db, deltas)
+    clustering.claim_departments(db, [(r.cluster_id, updated[r.id]["department"]) for r in rows if r.id in updated])
+    db.commit()
+    # Pending rows had no department, so dashboards see them from here
+    events.publish_created(
+        {**r._asdict(), **updated[r.id], "id": r.id} for r in rows if r.id in updated
+    )
+
+    with _stats_lock:
+        _stats["processed"] += len(params)
+        _stats["batches"] += 1
+        _stats["last_batch_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return len(params)
+
+def queue_stats(db: Session) -> Dict[str, Any]:
+    """Queue depth, age of the oldest pending row and worker counters."""
+    fb = models.Feedback
+    depth, oldest = db.execute(
+        select(func.count(fb.id), func.min(fb.created_at)).where(fb.status == PENDING_ANALYSIS)
+    ).one()
+    lag = 0.0
+    if oldest is not None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        lag = max(0.0, (now - oldest.replace(tzinfo=None)).total_seconds())
+    with _stats_lock:
+        counters = dict(_stats)
+    return {
+        "enabled": DEFERRED_ANALYSIS,
+        "worker_running": _worker is not None and _worker.is_alive(),
+        "depth": int(depth),
+        "lag_seconds": round(lag, 3),
+        **counters,
+    }
+
+class _Worker(threading.Thread):
+    def __init__(self):
+        super().__init__(name="analysis-worker", daemon=True)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            db = SessionLocal()
+            try:
+                # Drain full batches back to back, then wait for more work
+                while not self._stop_event.is_set() and process_pending(db) >= BATCH_SIZE:
+                    pass
+            except Exception as e:
+                db.rollback()
+                with _stats_lock:
+                    _stats["errors"] += 1
+                print(f"❌ Analysis worker error: {e}")
+            finally:
+                db.close()
+            _wakeup.wait(POLL_SECONDS)
+            _wakeup.clear()
+
+    def stop(self):
+        self._stop_event.set()
+        _wakeup.set()
+
+_worker: _Worker | None = None
+
+def start_worker() -> None:
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = _Worker()
+        _worker.start()
+
+def stop_worker() -> None:
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker.join(timeout=10)
+        _worker = None
@@ -0,0 +1,139 @@
+"""
+Incremental analytics rollups. Every write path that creates feedback
+or changes one of its dimensions calls ``record_change`` inside the same
+transaction, so ``feedback_rollups`` holds per-day and per-week counts by
+category, department, sentiment, priority and status without scanning
+the feedback table at read time.
+
+Counts are attributed to the bucket of the row's ``created_at``: a status
+change moves one count between status values in that bucket.
+"""
+from __future__ import annotations
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from .. import models
+
+DIMENSIONS = ("category", "department", "sentiment", "priority", "status")
+BUCKETS = ("day", "week")
+
+RollupKey = Tuple[str, date, str, str]
+
+def bucket_starts(created_at: datetime) -> Dict[str, date]:
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    day = created_at.date()
+    return {"day": day, "week": day - timedelta(days=day.weekday())}
+
+def deltas_for(
+    created_at: datetime,
+    old: Optional[Mapping[str, Any]],
+    new: Optional[Mapping[str, Any]],
+) -> Counter:
+    """Rollup count changes for one row going from ``old`` to ``new`` values
+    (None for an insert or delete)."""
+    out: Counter = Counter()
+    starts = bucket_starts(created_at)
+    for dim in DIMENSIONS:
+        before = old.get(dim) if old is not None else None
+        after = new.get(dim) if new is not None else None
+        if old is not None and new is not None and dim not in new:
+            continue
+        if before == after:
+            continue
+        for bucket, start in starts.items():
+            if old is not None and before is not None:
+                out[(bucket, start, dim, before)] -= 1
+            if new is not None and after is not None:
+                out[(bucket, start, dim, after)] += 1
+    return out
+
+def row_values(fb: models.Feedback) -> Dict[str, Any]:
+    return {dim: getattr(fb, dim) for dim in DIMENSIONS}
+
+def apply_deltas(db: Session, deltas: Mapping[RollupKey, int]) -> None:
+    """Upsert ``count = count + delta`` for each non-zero key."""
+    items = [(k, n) for k, n in deltas.items() if n]
+    if not items:
+        return
+    table = models.FeedbackRollup.__table__
+    dialect = db.get_bind().dialect.name
+    rows = [
+        {"bucket": b, "bucket_start": s, "dimension": d, "value": v, "count": n}
+        for (b, s, d, v), n in items
+    ]
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["bucket", "bucket_start", "dimension", "value"],
+            set_={"count": table.c.count + stmt.excluded.count},
+        )
+        db.execute(stmt, rows)
+        return
+    for row in rows:
+        key = (
+            (table.c.bucket == row["bucket"]) & (table.c.bucket_start == row["bucket_start"])
+            & (table.c.dimension == row["dimension"]) & (table.c.value == row["value"])
+        )
+        res = db.execute(update(table).where(key).values(count=table.c.count + row["count"]))
+        if res.rowcount == 0:
+            db.execute(table.insert().values(**row))
+
+def record_change(
+    db: Session,
+    created_at: datetime,
+    old: Optional[Mapping[str, Any]],
+    new: Optional[Mapping[str, Any]],
+) -> None:
+    apply_deltas(db, deltas_for(created_at, old, new))
+
+def record_inserts(db: Session, rows: Iterable[models.Feedback]) -> None:
+    total: Counter = Counter()
+    for fb in rows:
+        total.update(deltas_for(fb.created_at, None, row_values(fb)))
+    apply_deltas(db, total)
+
+def rebuild(db: Session, chunk: int = 5000) -> int:
+    """Recompute every rollup from the feedback table. Returns rows scanned."""
+    fb = models.Feedback
+    db.execute(delete(models.FeedbackRollup))
+    total: Counter = Counter()
+    scanned = 0
+    stmt = select(fb.created_at, *[getattr(fb, d) for d in DIMENSIONS]).execution_options(yield_per=chunk)
+    for row in db.execute(stmt):
+        scanned += 1
+        if row[0] is not None:
+            total.update(deltas_for(row[0], None, dict(zip(DIMENSIONS, row[1:]))))
+    apply_deltas(db, total)
+    db.commit()
+    return scanned
+
+def summary(
+    db: Session,
+    bucket: str = "day",
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    dimensions: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    r = models.FeedbackRollup
+    stmt = select(r.bucket_start, r.dimension, r.value, r.count).where(r.bucket == bucket, r.count != 0)
+    if since is not None:
+        stmt = stmt.where(r.bucket_start >= since)
+    if until is not None:
+        stmt = stmt.where(r.bucket_start <= until)
+    if dimensions:
+        stmt = stmt.where(r.dimension.in_(dimensions))
+    series: Dict[date, Dict[str, Dict[str, int]]] = {}
+    totals: Dict[str, Counter] = {}
+    for start, dim, value, count in db.execute(stmt.order_by(r.bucket_start, r.dimension, r.value)):
+        series.setdefault(start, {}).setdefault(dim, {})[value] = count
+        totals.setdefault(dim, Counter())[value] += count
+    return {
+        "bucket": bucket,
+        "series": [{"bucket_start": start, **dims} for start, dims in series.items()],
+        "totals": {dim: dict(c) for dim, c in totals.items()},
+    }
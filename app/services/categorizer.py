@@ -1,11 +1,17 @@
 from __future__ import annotations
+from collections import Counter
 from typing import Dict, List, Tuple
 import re
-from difflib import get_close_matches
+import functools
+from difflib import SequenceMatcher, get_close_matches
+
+from . import rules
+from .lexicon import URGENCY_WORDS, scan  # noqa: F401  (URGENCY_WORDS re-exported)
+from .nlp_cache import category_cache
 
 DEFAULT_DEPARTMENT = "Student Affairs"
 
-# Canonical keyword dictionary
+# Built-in keyword dictionary; the active rule set's may differ (rules.py)
 CATEGORY_KEYWORDS: Dict[str, List[str]] = {
     "Hostel": [
         "hostel", "dorm", "room", "warden", "mess", "canteen", "mess food",
@@ -24,8 +30,7 @@ CATEGORY_KEYWORDS: Dict[str, List[str]] = {
     "IT Support": ["portal", "login", "password", "server", "email", "it", "software", "network"],
 }
 
-# Words indicating urgency or severity
-URGENCY_WORDS = {"urgent", "immediately", "asap", "unsafe", "emergency", "harass", "bully", "no water", "power cut"}
+FUZZY_CUTOFF = 0.83
 
 def _tokens(text: str) -> List[str]:
     t = re.sub(r"[^a-zA-Z0-9\s]", " ", (text or "").lower())
@@ -35,39 +40,137 @@ def _approx_hit(word: str, vocab: List[str]) -> bool:
     """Return True if word is in vocab or close enough (typos)."""
     if word in vocab:
         return True
-    close = get_close_matches(word, vocab, n=1, cutoff=0.83)
+    close = get_close_matches(word, vocab, n=1, cutoff=FUZZY_CUTOFF)
     return bool(close)
 
-def categorize(text: str) -> Dict[str, str | int]:
-    """
-    Returns: {"category","department","hits"}
+class KeywordMatcher:
     """
-    words = _tokens(text)
-    joined = " ".join(words)
+    Keyword dictionary compiled once into lookup structures:
 
-    best_cat: str | None = None
-    best_hits = 0
+    * exact index: vocab word -> categories containing it
+    * phrase automaton: one overlapping-match regex over all multi-word phrases
+    * fuzzy index: vocab bucketed by length with character counts, so only
+      words that can reach ``cutoff`` are handed to ``SequenceMatcher``
 
-    for cat, vocab in CATEGORY_KEYWORDS.items():
-        hits = 0
+    Per-token results are memoised in an LRU, so repeated words cost a lookup.
+    Hit counts are identical to scanning every category with ``_approx_hit``.
+    """
 
-        # phrase hits
-        for phrase in [v for v in vocab if " " in v]:
-            if phrase in joined:
-                hits += 2
+    TOKEN_CACHE_SIZE = 50_000
+
+    def __init__(self, keywords: Dict[str, List[str]], cutoff: float = FUZZY_CUTOFF):
+        self.categories: Tuple[str, ...] = tuple(keywords)
+        self.cutoff = cutoff
+
+        exact: Dict[str, List[int]] = {}
+        phrase_owners: Dict[str, List[int]] = {}
+        for idx, vocab in enumerate(keywords.values()):
+            for v in vocab:
+                bucket = phrase_owners if " " in v else exact
+                owners = bucket.setdefault(v, [])
+                if idx not in owners:
+                    owners.append(idx)
+        self._exact: Dict[str, Tuple[int, ...]] = {w: tuple(c) for w, c in exact.items()}
+        self._phrase_owners: Dict[str, Tuple[int, ...]] = {p: tuple(c) for p, c in phrase_owners.items()}
+
+        # Longest alternative first: whatever else matches at the same position
+        # is a prefix of the reported phrase, resolved via _phrase_prefixes.
+        phrases = sorted(phrase_owners, key=len, reverse=True)
+        self._phrase_re = (
+            re.compile("(?=(" + "|".join(re.escape(p) for p in phrases) + "))") if phrases else None
+        )
+        self._phrase_prefixes: Dict[str, Tuple[str, ...]] = {
+            p: tuple(q for q in phrases if p.startswith(q)) for p in phrases
+        }
+
+        by_len: Dict[int, List[Tuple[str, Counter, Tuple[int, ...]]]] = {}
+        for w, owners in self._exact.items():
+            by_len.setdefault(len(w), []).append((w, Counter(w), owners))
+        self._by_len = by_len
+
+        # Bounded LRU (thread-safe) so one-off tokens age out without
+        # dropping the hot vocabulary with them.
+        self.token_owners = functools.lru_cache(maxsize=self.TOKEN_CACHE_SIZE)(self._fuzzy_owners)
+
+    def _fuzzy_owners(self, word: str) -> Tuple[int, ...]:
+        """Categories whose single-word vocab contains ``word`` or a close match."""
+        hit = set(self._exact.get(word, ()))
+        n = len(word)
+        word_counts: Counter | None = None
+        cutoff = self.cutoff
+        for length, entries in self._by_len.items():
+            # ratio = 2*M/(n+length) and M <= min(n, length)
+            if 2.0 * min(n, length) / (n + length) < cutoff:
+                continue
+            for v, v_counts, owners in entries:
+                if hit.issuperset(owners):
+                    continue
+                if word_counts is None:
+                    word_counts = Counter(word)
+                common = sum((word_counts & v_counts).values())
+                if 2.0 * common / (n + length) < cutoff:
+                    continue
+                # Same argument order as difflib.get_close_matches
+                if SequenceMatcher(None, v, word).ratio() >= cutoff:
+                    hit.update(owners)
+        return tuple(sorted(hit))
+
+    def hits(self, words: List[str]) -> List[int]:
+        """Per-category hit counts, in ``categories`` order."""
+        counts = [0] * len(self.categories)
+
+        if self._phrase_re is not None:
+            joined = " ".join(words)
+            found = set()
+            for m in self._phrase_re.finditer(joined):
+                found.update(self._phrase_prefixes[m.group(1)])
+            for phrase in found:
+                for idx in self._phrase_owners[phrase]:
+                    counts[idx] += 2
 
-        # token hits (with fuzzy)
         for w in words:
-            if _approx_hit(w, [v for v in vocab if " " not in v]):
-                hits += 1
+            for idx in self.token_owners(w):
+                counts[idx] += 1
+        return counts
+
+    def best(self, words: List[str]) -> Tuple[str | None, int]:
+        best_cat: str | None = None
+        best_hits = 0
+        for cat, hits in zip(self.categories, self.hits(words)):
+            if hits > best_hits:
+                best_hits, best_cat = hits, cat
+        return best_cat, best_hits
+
+def reload_matcher(keywords: Dict[str, List[str]] | None = None) -> KeywordMatcher:
+    """Recompile the matcher, e.g. after editing CATEGORY_KEYWORDS. The
+    other rules stay as they are; the result is an unversioned rule set."""
+    current = rules.active().rules
+    keywords = CATEGORY_KEYWORDS if keywords is None else keywords
+    return rules.install(rules.RuleSet(None, {**current, "category_keywords": keywords})).matcher
 
-        if hits > best_hits:
-            best_hits, best_cat = hits, cat
+def categorize(text: str) -> Dict[str, str | int]:
+    """
+    Returns: {"category","department","hits"}
+    """
+    return _cached_categorize(scan(text).norm)
+
+def categorize_tokens(words: List[str]) -> Dict[str, str | int]:
+    """categorize() for text already split by _tokens()."""
+    return _cached_categorize(" ".join(words))
+
+def _cached_categorize(key: str) -> Dict[str, str | int]:
+    # The result depends only on _tokens(key), which is the same for the
+    # normalized text and for the joined token list.
+    matcher = rules.active().matcher
+    return dict(category_cache.get_or_compute((matcher, key), lambda: _categorize_words(matcher, _tokens(key))))
+
+def _categorize_words(matcher: KeywordMatcher, words: List[str]) -> Dict[str, str | int]:
+    best_cat, best_hits = matcher.best(words)
 
     if not best_cat:
         best_cat = "General"
 
-    department = best_cat if best_cat in CATEGORY_KEYWORDS else DEFAULT_DEPARTMENT
+    department = best_cat if best_cat in matcher.categories else DEFAULT_DEPARTMENT
 
     return {"category": best_cat, "department": department, "hits": int(best_hits)}
 
@@ -75,10 +178,7 @@ def priority_from(sentiment_label: str, hits: int, text: str, category: str) ->
     """
     Heuristic priority:
     """
-    t = " " + (text or "").lower() + " "
-    has_urgency = any(k in t for k in URGENCY_WORDS)
-
-    if has_urgency:
+    if scan(text).urgent:
         return "high"
 
     if sentiment_label == "negative":
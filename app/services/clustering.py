@@ -0,0 +1,216 @@
+"""
+Near-duplicate clustering of feedback messages with MinHash + LSH.
+
+Each message's word set (categorizer._tokens minus filler words) gets a
+MinHash signature of ``NUM_PERM`` values, cut into ``BANDS`` bands. Every
+cluster stores its signature and one ``feedback_cluster_bands`` row per
+band, so a new message only looks up the clusters sharing one of its band
+keys (an indexed IN query), never the whole history. A candidate is
+accepted when the estimated Jaccard similarity with the cluster's first
+message is at least ``CLUSTER_THRESHOLD``; otherwise the message starts a
+new cluster.
+
+    CLUSTER_THRESHOLD   minimum estimated similarity, default 0.6
+"""
+from __future__ import annotations
+import os
+import random
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+from .. import models
+from .categorizer import _tokens
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MIN_FEATURES = 3
+CLUSTER_THRESHOLD = float(os.getenv("CLUSTER_THRESHOLD", "0.6"))
+LOOKUP_CHUNK = 500
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "am", "in", "on", "at", "of",
+    "to", "for", "and", "or", "my", "our", "i", "we", "it", "this", "that", "has", "have",
+    "had", "please", "sir", "madam", "dear", "with", "from", "by", "me", "us", "you",
+}
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240501)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+def features(message: str) -> Set[str]:
+    return {w for w in _tokens(message) if w not in STOPWORDS}
+
+def signature(feats: Iterable[str]) -> List[int]:
+    hashes = [zlib.crc32(f.encode()) for f in feats]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+def band_keys(sig: Sequence[int]) -> List[str]:
+    return [
+        f"{band}:{zlib.crc32(','.join(map(str, sig[band * ROWS:(band + 1) * ROWS])).encode()):08x}"
+        for band in range(BANDS)
+    ]
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of the two word sets."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+def _encode(sig: Sequence[int]) -> str:
+    return ",".join(map(str, sig))
+
+def _decode(raw: str) -> List[int]:
+    return [int(v) for v in raw.split(",")]
+
+class Item(NamedTuple):
+    message: str
+    department: Optional[str] = None
+    seen_at: Optional[datetime] = None
+
+def assign_clusters(db: Session, items: Sequence[Item]) -> List[Optional[int]]:
+    """
+    Cluster id for each item, creating clusters as needed, in the caller's
+    transaction. Items are matched against earlier items of the same call
+    too. Messages with fewer than MIN_FEATURES words are not clustered.
+    """
+    clusters = models.FeedbackCluster.__table__
+    bands = models.FeedbackClusterBand.__table__
+    now = datetime.now(timezone.utc)
+
+    sigs: List[Optional[List[int]]] = []
+    keys: List[List[str]] = []
+    for item in items:
+        feats = features(item.message)
+        sig = signature(feats) if len(feats) >= MIN_FEATURES else None
+        sigs.append(sig)
+        keys.append(band_keys(sig) if sig else [])
+
+    # Existing clusters sharing any band key with the batch
+    owners: Dict[str, Set[int]] = {}
+    all_keys = list({k for ks in keys for k in ks})
+    for i in range(0, len(all_keys), LOOKUP_CHUNK):
+        rows = db.execute(
+            bands.select().with_only_columns(bands.c.band_key, bands.c.cluster_id)
+            .where(bands.c.band_key.in_(all_keys[i:i + LOOKUP_CHUNK]))
+        )
+        for key, cid in rows:
+            owners.setdefault(key, set()).add(cid)
+    known: Dict[int, List[int]] = {}
+    last_seen: Dict[int, datetime] = {}
+    cids = list({c for cs in owners.values() for c in cs})
+    for i in range(0, len(cids), LOOKUP_CHUNK):
+        rows = db.execute(
+            clusters.select().with_only_columns(clusters.c.id, clusters.c.signature, clusters.c.last_seen_at)
+            .where(clusters.c.id.in_(cids[i:i + LOOKUP_CHUNK]))
+        )
+        for cid, raw, seen in rows:
+            known[cid] = _decode(raw)
+            last_seen[cid] = seen
+
+    result: List[Optional[int]] = []
+    grown: Counter = Counter()
+    new_bands: List[dict] = []
+    touched: Dict[int, datetime] = {}
+    for item, sig, ks in zip(items, sigs, keys):
+        if sig is None:
+            result.append(None)
+            continue
+        seen_at = item.seen_at or now
+        candidates = {c for k in ks for c in owners.get(k, ())}
+        best, best_sim = None, CLUSTER_THRESHOLD
+        for cid in candidates:
+            sim = similarity(sig, known[cid])
+            if sim >= best_sim and (best is None or sim > best_sim or cid < best):
+                best, best_sim = cid, sim
+        if best is None:
+            best = db.execute(
+                clusters.insert().values(
+                    size=0, department=item.department, sample_message=item.message[:500],
+                    signature=_encode(sig), first_seen_at=seen_at, last_seen_at=seen_at,
+                )
+            ).inserted_primary_key[0]
+            known[best] = sig
+            for k in ks:
+                owners.setdefault(k, set()).add(best)
+                new_bands.append({"band_key": k, "cluster_id": best})
+        grown[best] += 1
+        prev = touched.get(best) or last_seen.get(best)
+        touched[best] = seen_at if prev is None or _naive(seen_at) > _naive(prev) else prev
+        result.append(best)
+
+    if new_bands:
+        db.execute(bands.insert(), new_bands)
+    if grown:
+        db.execute(
+            update(clusters)
+            .where(clusters.c.id == bindparam("cid"))
+            .values(size=clusters.c.size + bindparam("n"), last_seen_at=bindparam("seen")),
+            [{"cid": cid, "n": n, "seen": touched[cid]} for cid, n in grown.items()],
+        )
+    return result
+
+def assign_cluster(db: Session, message: str, department: Optional[str] = None) -> Optional[int]:
+    return assign_clusters(db, [Item(message, department)])[0]
+
+def claim_departments(db: Session, pairs: Iterable[Tuple[Optional[int], str]]) -> None:
+    """Give clusters created from pending (unclassified) rows the department
+    of their first classified member."""
+    clusters = models.FeedbackCluster.__table__
+    first: Dict[int, str] = {}
+    for cid, dept in pairs:
+        if cid is not None:
+            first.setdefault(cid, dept)
+    params = [{"cid": cid, "dept": dept} for cid, dept in first.items()]
+    if params:
+        db.execute(
+            update(clusters)
+            .where(clusters.c.id == bindparam("cid"), clusters.c.department.is_(None))
+            .values(department=bindparam("dept")),
+            params,
+        )
+
+def list_clusters(db: Session, department: Optional[str] = None, min_size: int = 2, limit: int = 50):
+    """Largest clusters first, then the most recently active."""
+    c = models.FeedbackCluster
+    q = db.query(c).filter(c.size >= min_size)
+    if department:
+        q = q.filter(c.department == department)
+    return q.order_by(c.size.desc(), c.last_seen_at.desc(), c.id.desc()).limit(limit).all()
+
+def _naive(value: datetime) -> datetime:
+    # SQLite hands timestamps back without tzinfo
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def backfill(db: Session, chunk_size: int = 5000, log=print) -> int:
+    """Cluster feedback stored before clustering existed, oldest first."""
+    fb = models.Feedback
+    table = fb.__table__
+    done, last_id = 0, 0
+    while True:
+        rows = (
+            db.query(fb.id, fb.message, fb.department, fb.created_at)
+            .filter(fb.cluster_id.is_(None), fb.id > last_id)
+            .order_by(fb.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            return done
+        ids = assign_clusters(db, [Item(r.message or "", r.department, r.created_at) for r in rows])
+        params = [{"fid": r.id, "cid": cid} for r, cid in zip(rows, ids) if cid is not None]
+        if params:
+            db.execute(
+                update(table)
+                .where(table.c.id == bindparam("fid"))
+                # keep updated_at: clustering is not an edit (export watermarks rely on it)
+                .values(cluster_id=bindparam("cid"), updated_at=table.c.updated_at),
+                params,
+            )
+        db.commit()
+        done += len(rows)
+        last_id = rows[-1].id
+        log(f"clustered {done} rows")
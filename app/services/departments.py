@@ -0,0 +1,98 @@
+"""
+In-process department registry. The table holds a handful of rows that
+almost never change, so name->id and the ordered list are served from
+memory. Any committed insert/update/delete of a Department in this
+process invalidates it; DEPARTMENT_CACHE_TTL bounds staleness for
+changes made by other processes.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .. import models
+
+CACHE_TTL = float(os.getenv("DEPARTMENT_CACHE_TTL", "300"))
+
+DEFAULT_DEPARTMENTS = [
+    "Hostel", "Academics", "Finance", "Transport",
+    "Health", "Counselling", "IT Support", "Student Affairs"
+]
+
+class DepartmentInfo(NamedTuple):
+    id: int
+    name: str
+    created_at: Optional[datetime]
+
+class DepartmentRegistry:
+    def __init__(self, ttl: float = CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ordered: List[DepartmentInfo] | None = None
+        self._by_name: Dict[str, DepartmentInfo] = {}
+        self._by_id: Dict[int, DepartmentInfo] = {}
+        self._loaded_at = 0.0
+
+    def load(self, db: Session) -> List[DepartmentInfo]:
+        rows = db.query(models.Department.id, models.Department.name, models.Department.created_at) \
+            .order_by(models.Department.name.asc()).all()
+        ordered = [DepartmentInfo(*r) for r in rows]
+        with self._lock:
+            self._ordered = ordered
+            self._by_name = {d.name: d for d in ordered}
+            self._by_id = {d.id: d for d in ordered}
+            self._loaded_at = time.monotonic()
+        return ordered
+
+    def seed_defaults(self, db: Session) -> None:
+        """Create the default departments on an empty table."""
+        if db.query(models.Department).count() == 0:
+            for name in DEFAULT_DEPARTMENTS:
+                db.add(models.Department(name=name))
+            db.commit()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._ordered = None
+
+    def _current(self, db: Session) -> List[DepartmentInfo]:
+        ordered = self._ordered
+        if ordered is None or time.monotonic() - self._loaded_at > self.ttl:
+            ordered = self.load(db)
+        return ordered
+
+    def ordered(self, db: Session) -> List[DepartmentInfo]:
+        """All departments, ordered by name."""
+        return list(self._current(db))
+
+    def id_for(self, name: str, db: Session) -> Optional[int]:
+        self._current(db)
+        d = self._by_name.get(name)
+        return d.id if d else None
+
+    def get(self, dept_id: int, db: Session) -> Optional[DepartmentInfo]:
+        self._current(db)
+        return self._by_id.get(dept_id)
+
+    def ids_by_name(self, db: Session) -> Dict[str, int]:
+        self._current(db)
+        return {name: d.id for name, d in self._by_name.items()}
+
+registry = DepartmentRegistry()
+
+@event.listens_for(Session, "after_flush")
+def _track_department_changes(session, flush_context):
+    if any(isinstance(o, models.Department) for o in (*session.new, *session.dirty, *session.deleted)):
+        session.info["departments_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("departments_changed", False):
+        registry.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("departments_changed", None)
@@ -0,0 +1,195 @@
+"""
+Live updates for the department dashboards.
+
+Writers call ``publish_created`` / ``publish_status`` after their commit;
+each open dashboard holds a ``subscribe(department)`` on the broker and
+receives the events over Server-Sent Events. Publishing to a department
+nobody is watching is a dict lookup.
+
+The default broker is in-process, so a dashboard only sees changes made
+by the worker process serving it. With several uvicorn workers, or the
+ingest CLI writing from another process, set EVENTS_BACKEND=redis to fan
+events out through Redis pub/sub (needs the ``redis`` package).
+
+    EVENTS_BACKEND      "local" (default) or "redis"
+    EVENTS_REDIS_URL    default redis://localhost:6379/0
+    EVENTS_QUEUE_SIZE   events buffered per dashboard, default 100; a
+                        dashboard that falls further behind is told to reload
+"""
+from __future__ import annotations
+import asyncio
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "local").strip().lower()
+REDIS_URL = os.getenv("EVENTS_REDIS_URL", "redis://localhost:6379/0")
+QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+
+# Fields the dashboard card shows; sent with "created" so pushing a card
+# needs no query
+CARD_FIELDS = (
+    "id", "parent_name", "parent_email", "student_id", "message",
+    "category", "sentiment", "priority", "status",
+)
+
+RESET = {"type": "reset"}
+
+class Subscription:
+    """One listener on one topic, read from the event loop that opened it."""
+
+    def __init__(self, broker: "LocalBroker", topic: str, maxsize: int):
+        self.topic = topic
+        self._broker = broker
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        """Thread-safe: hand ``event`` to this subscription's loop."""
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # loop already closed; the subscription is on its way out
+            pass
+
+    def _put(self, event: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind to catch up event by event
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESET)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """The next event, or None after ``timeout`` seconds without one."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self._broker.unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class LocalBroker:
+    """Fan-out to the subscriptions of this process."""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str) -> Subscription:
+        """Must be called from a running event loop."""
+        sub = Subscription(self, topic, self.queue_size)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._topics.get(sub.topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._topics[sub.topic]
+
+    def subscribers(self, topic: str) -> int:
+        return len(self._topics.get(topic, ()))
+
+    def publish(self, topic: str, event: Dict[str, Any]) -> None:
+        with self._lock:
+            subs = list(self._topics.get(topic, ()))
+        for sub in subs:
+            sub.deliver(event)
+
+    def close(self) -> None:
+        pass
+
+class RedisBroker(LocalBroker):
+    """
+    Publishes to Redis; one listener thread per process relays the
+    channels back to the local subscriptions, so events from every
+    process reach every dashboard.
+    """
+    PREFIX = "feedback-events:"
+
+    def __init__(self, url: str = REDIS_URL, queue_size: int = QUEUE_SIZE):
+        import redis
+
+        super().__init__(queue_size)
+        self._redis = redis.Redis.from_url(url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(**{f"{self.PREFIX}*": self._relay})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def _relay(self, message) -> None:
+        topic = message["channel"].decode()[len(self.PREFIX):]
+        super().publish(topic, json.loads(message["data"]))
+
+    def publish(self, topic: str, event: Dict[str, Any]) -> None:
+        self._redis.publish(self.PREFIX + topic, json.dumps(event))
+
+    def close(self) -> None:
+        self._thread.stop()
+        self._pubsub.close()
+        self._redis.close()
+
+_broker: LocalBroker | None = None
+_broker_lock = threading.Lock()
+
+def broker() -> LocalBroker:
+    """The process-wide broker, created on first use."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                if EVENTS_BACKEND == "redis":
+                    try:
+                        _broker = RedisBroker()
+                    except ImportError:
+                        print("⚠️ EVENTS_BACKEND=redis but redis is not installed; using the in-process broker")
+                        _broker = LocalBroker()
+                else:
+                    _broker = LocalBroker()
+    return _broker
+
+def set_broker(new: LocalBroker) -> None:
+    """Swap in another broker (a different backend, or one for tests)."""
+    global _broker
+    with _broker_lock:
+        old, _broker = _broker, new
+    if old is not None and old is not new:
+        old.close()
+
+def shutdown() -> None:
+    global _broker
+    with _broker_lock:
+        old, _broker = _broker, None
+    if old is not None:
+        old.close()
+
+def card(row: Any) -> Dict[str, Any]:
+    if isinstance(row, dict):
+        return {f: row.get(f) for f in CARD_FIELDS}
+    return {f: getattr(row, f) for f in CARD_FIELDS}
+
+def publish_created(rows: Iterable[Any]) -> None:
+    """Push newly classified feedback (ORM rows or dicts) to their departments."""
+    b = broker()
+    for row in rows:
+        data = card(row)
+        department = row.get("department") if isinstance(row, dict) else row.department
+        if department:
+            b.publish(department, {"type": "created", "feedback": data})
+
+def publish_status(department: Optional[str], ids: List[int], status: str) -> None:
+    if department and ids:
+        broker().publish(department, {"type": "status", "ids": list(ids), "status": status})
@@ -0,0 +1,59 @@
+from __future__ import annotations
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, List
+from sqlalchemy import or_, select
+from .. import models, schemas
+from ..database import SessionLocal
+from .pagination import timestamp_literal
+
+EXPORT_FIELDS: List[str] = list(schemas.FeedbackOut.model_fields)
+YIELD_PER = 1000
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+def _rows(filters: dict, since: datetime | None) -> Iterator[tuple]:
+    """
+    Stream matching rows in id order with a server-side cursor. Owns its
+    session: the request's session is closed before the body is streamed.
+    """
+    fb = models.Feedback
+    db = SessionLocal()
+    try:
+        stmt = select(*[getattr(fb, f) for f in EXPORT_FIELDS]).order_by(fb.id.asc())
+        for column, value in filters.items():
+            if value:
+                stmt = stmt.where(getattr(fb, column) == value)
+        if since is not None:
+            bound = timestamp_literal(db.get_bind().dialect.name, since, fb.created_at.type)
+            stmt = stmt.where(or_(fb.created_at >= bound, fb.updated_at >= bound))
+        yield from db.execute(stmt.execution_options(yield_per=YIELD_PER))
+    finally:
+        db.close()
+
+def iter_ndjson(filters: dict, since: datetime | None) -> Iterator[str]:
+    buf: List[str] = []
+    for row in _rows(filters, since):
+        buf.append(json.dumps(dict(zip(EXPORT_FIELDS, row)), default=_json_default))
+        if len(buf) >= YIELD_PER:
+            yield "\n".join(buf) + "\n"
+            buf.clear()
+    if buf:
+        yield "\n".join(buf) + "\n"
+
+def iter_csv(filters: dict, since: datetime | None) -> Iterator[str]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_FIELDS)
+    for n, row in enumerate(_rows(filters, since), 1):
+        writer.writerow(["" if v is None else v.isoformat() if isinstance(v, datetime) else v for v in row])
+        if n % YIELD_PER == 0:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+    yield out.getvalue()
@@ -1,16 +1,16 @@
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from .. import models
-from .routing_agent import run_agent
+from . import analysis_queue, analytics, clustering, departments, events, metrics, pagination
+from .routing_agent import run_agent, run_agent_batch
 
-def create_feedback_service(payload, db: Session):
-    """
-    Service function to create feedback (to avoid circular imports)
-    """
-    agent_out = run_agent(payload)
-    # Find department_id if exists
-    dept = db.query(models.Department).filter(models.Department.name==agent_out["department"]).first()
-    
-    fb = models.Feedback(
+def _feedback_row(payload, agent_out, department_id):
+    return models.Feedback(
         parent_name=payload["parent_name"],
         parent_email=payload["parent_email"],
         student_id=payload.get("student_id"),
@@ -22,9 +22,192 @@ def create_feedback_service(payload, db: Session):
         category=agent_out["category"],
         priority=agent_out["priority"],
         department=agent_out["department"],
-        department_id=dept.id if dept else None,
+        department_id=department_id,
+        rules_version=agent_out.get("rules_version"),
+    )
+
+def _deferred(defer: bool | None) -> bool:
+    return analysis_queue.DEFERRED_ANALYSIS if defer is None else defer
+
+def _stage(name: str, started: float) -> float:
+    now = metrics.clock()
+    metrics.FEEDBACK_STAGE_SECONDS.observe(now - started, name)
+    return now
+
+def _store_pending(payload, db: Session) -> models.Feedback:
+    t = metrics.clock()
+    cluster_id = clustering.assign_cluster(db, payload["message"])
+    t = _stage("cluster", t)
+    fb = models.Feedback(
+        parent_name=payload["parent_name"],
+        parent_email=payload["parent_email"],
+        student_id=payload.get("student_id"),
+        message=payload["message"],
+        channel=payload.get("channel", "web"),
+        status=analysis_queue.PENDING_ANALYSIS,
+        cluster_id=cluster_id,
     )
     db.add(fb)
+    db.flush()
+    analytics.record_inserts(db, [fb])
+    t = _stage("insert", t)
+    db.commit()
+    db.refresh(fb)
+    _stage("commit", t)
+    analysis_queue.notify()
+    return fb
+
+def _store_classified(payload, agent_out, db: Session) -> models.Feedback:
+    t = metrics.clock()
+    department_id = departments.registry.id_for(agent_out["department"], db)
+    t = _stage("department_lookup", t)
+    fb = _feedback_row(payload, agent_out, department_id)
+    fb.cluster_id = clustering.assign_cluster(db, payload["message"], agent_out["department"])
+    t = _stage("cluster", t)
+    db.add(fb)
+    db.flush()
+    analytics.record_inserts(db, [fb])
+    t = _stage("insert", t)
     db.commit()
     db.refresh(fb)
-    return fb
\ No newline at end of file
+    _stage("commit", t)
+    events.publish_created([fb])
+    return fb
+
+def create_feedback_service(payload, db: Session, defer: bool | None = None):
+    """
+    Service function to create feedback (to avoid circular imports).
+    With deferred analysis (DEFERRED_ANALYSIS=true, or defer=True) the raw
+    message is stored as pending_analysis and classified by the worker.
+    """
+    started = metrics.clock()
+    if _deferred(defer):
+        fb = _store_pending(payload, db)
+    else:
+        agent_out = run_agent(payload)
+        _stage("classify", started)
+        fb = _store_classified(payload, agent_out, db)
+    _stage("total", started)
+    return fb
+
+async def create_feedback_service_async(payload, db: AsyncSession, defer: bool | None = None):
+    """
+    create_feedback_service for an AsyncSession: the CPU-bound agent runs
+    in the threadpool, the writes run on the async connection.
+    """
+    if _deferred(defer):
+        return await db.run_sync(lambda s: _store_pending(payload, s))
+    agent_out = await run_in_threadpool(run_agent, payload)
+    return await db.run_sync(lambda s: _store_classified(payload, agent_out, s))
+
+RELOAD_CHUNK_SIZE = 500
+
+def create_feedback_batch_service(payloads: List[dict], db: Session) -> List[models.Feedback]:
+    """
+    Classify and insert many feedback rows in one transaction.
+    Returned rows are in the same order as payloads.
+    """
+    if not payloads:
+        return []
+    agent_outs = run_agent_batch(payloads)
+    dept_ids = departments.registry.ids_by_name(db)
+
+    cluster_ids = clustering.assign_clusters(
+        db, [clustering.Item(p["message"], out["department"]) for p, out in zip(payloads, agent_outs)]
+    )
+
+    rows = [
+        _feedback_row(payload, out, dept_ids.get(out["department"]))
+        for payload, out in zip(payloads, agent_outs)
+    ]
+    for fb, cluster_id in zip(rows, cluster_ids):
+        fb.cluster_id = cluster_id
+    db.add_all(rows)
+    db.flush()
+    analytics.record_inserts(db, rows)
+    ids = [fb.id for fb in rows]
+    db.commit()
+
+    # Load server defaults (created_at) with a few IN queries instead of one refresh per row
+    loaded = {}
+    for i in range(0, len(ids), RELOAD_CHUNK_SIZE):
+        chunk = (
+            db.query(models.Feedback)
+            .filter(models.Feedback.id.in_(ids[i:i + RELOAD_CHUNK_SIZE]))
+            .populate_existing()
+        )
+        loaded.update((fb.id, fb) for fb in chunk)
+    rows = [loaded[i] for i in ids]
+    events.publish_created(rows)
+    return rows
+
+STATUS_FILTERS = ("department", "category", "cluster_id")
+
+def update_status_service(
+    db: Session,
+    status: str,
+    ids: Optional[List[int]] = None,
+    unmodified_since: Optional[datetime] = None,
+    **filters,
+) -> Tuple[List[int], List[int]]:
+    """
+    Move every row matching ``ids`` and/or the equality ``filters`` to
+    ``status`` in one transaction. Returns (updated ids, conflicting ids).
+
+    There is one UPDATE per current status value rather than per row, and
+    each is guarded on that value, so the rollup deltas are exact even
+    when another request changes the same rows concurrently. With
+    ``unmodified_since``, rows created or changed in that second or later
+    are left alone and returned as conflicts. Timestamps have one-second
+    resolution on SQLite, so a change in the same second counts too.
+    Rows already at ``status`` and rows still pending analysis are skipped.
+    """
+    fb = models.Feedback
+    dialect = db.get_bind().dialect
+    where = [fb.status != status, fb.status != analysis_queue.PENDING_ANALYSIS]
+    if ids is not None:
+        where.append(fb.id.in_(ids))
+    for column, value in filters.items():
+        if value is not None:
+            where.append(getattr(fb, column) == value)
+    changed = None
+    if unmodified_since is not None:
+        bound = pagination.timestamp_literal(
+            dialect.name, unmodified_since.replace(microsecond=0), fb.updated_at.type
+        )
+        changed = func.coalesce(fb.updated_at, fb.created_at) >= bound
+
+    current = db.execute(select(fb.status).where(*where).distinct()).scalars().all()
+    deltas: Counter = Counter()
+    moved: dict = {}
+    for old in current:
+        guard = [*where, fb.status == old]
+        if changed is not None:
+            guard.append(~changed)
+        if dialect.update_returning:
+            rows = db.execute(
+                update(fb).where(*guard).values(status=status)
+                .returning(fb.id, fb.created_at, fb.department)
+                .execution_options(synchronize_session=False)
+            ).all()
+        else:
+            rows = db.execute(select(fb.id, fb.created_at, fb.department).where(*guard).with_for_update()).all()
+            db.execute(
+                update(fb).where(fb.id.in_([r.id for r in rows])).values(status=status)
+                .execution_options(synchronize_session=False)
+            )
+        for r in rows:
+            deltas.update(analytics.deltas_for(r.created_at, {"status": old}, {"status": status}))
+            moved[r.id] = r.department
+    analytics.apply_deltas(db, deltas)
+    conflicts: List[int] = []
+    if changed is not None:
+        conflicts = sorted(db.execute(select(fb.id).where(*where, changed)).scalars())
+    db.commit()
+
+    by_department: dict = {}
+    for fb_id, department in moved.items():
+        by_department.setdefault(department, []).append(fb_id)
+    for department, dept_ids in by_department.items():
+        events.publish_status(department, sorted(dept_ids), status)
+    return sorted(moved), conflicts
@@ -0,0 +1,91 @@
+"""
+Conditional GET for the admin HTML views.
+
+The validator is the newest created_at/updated_at in ``feedback`` plus the
+highest id, read with three index lookups. Any insert or status change
+moves it, so an unchanged dashboard is answered with 304 before it is
+queried or rendered. Timestamps have one-second resolution on SQLite, so
+a change made in the same second as the latest one could go unnoticed;
+pages whose latest change is that recent are served without validators.
+"""
+from __future__ import annotations
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import NamedTuple, Optional
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from .. import models
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+SETTLE = timedelta(seconds=1)
+
+class Validators(NamedTuple):
+    etag: str
+    last_modified: datetime
+
+def _template_version() -> str:
+    # Deploying changed templates must invalidate cached pages
+    stamp = hashlib.sha1()
+    for name in sorted(os.listdir(TEMPLATES_DIR)):
+        st = os.stat(os.path.join(TEMPLATES_DIR, name))
+        stamp.update(f"{name}:{st.st_mtime_ns}:{st.st_size};".encode())
+    return stamp.hexdigest()[:12]
+
+TEMPLATE_VERSION = _template_version()
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def feedback_validators(db: Session, *parts: object) -> Optional[Validators]:
+    """
+    Validators for a page built from ``feedback``; ``parts`` are anything
+    else the page depends on (filters, page size). None when the table is
+    empty or changed within the last second.
+    """
+    fb = models.Feedback
+    max_id = db.execute(select(func.max(fb.id))).scalar()
+    if max_id is None:
+        return None
+    created = _utc(db.execute(select(func.max(fb.created_at))).scalar())
+    updated = _utc(db.execute(select(func.max(fb.updated_at))).scalar())
+    stamps = [t for t in (created, updated) if t is not None]
+    now = datetime.now(timezone.utc)
+    if not stamps or max(stamps) >= now - SETTLE:
+        return None
+    latest = max(stamps)
+    # the year is in the page footer
+    seed = "|".join(map(str, (TEMPLATE_VERSION, max_id, created, updated, now.year, *parts)))
+    return Validators(f'W/"{hashlib.sha1(seed.encode()).hexdigest()[:20]}"', latest.replace(microsecond=0))
+
+def not_modified(request: Request, validators: Optional[Validators]) -> Optional[Response]:
+    """A 304 response if the client's cached copy is current, else None."""
+    if validators is None:
+        return None
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        fresh = validators.etag in {tag.strip() for tag in inm.split(",")} or inm.strip() == "*"
+    else:
+        ims = request.headers.get("if-modified-since")
+        try:
+            fresh = ims is not None and validators.last_modified <= _utc(parsedate_to_datetime(ims))
+        except (TypeError, ValueError):
+            fresh = False
+    if not fresh:
+        return None
+    response = Response(status_code=304)
+    apply(response, validators)
+    return response
+
+def apply(response: Response, validators: Optional[Validators]) -> Response:
+    response.headers["Cache-Control"] = "private, no-cache"
+    if validators is not None:
+        response.headers["ETag"] = validators.etag
+        response.headers["Last-Modified"] = format_datetime(validators.last_modified, usegmt=True)
+    return response
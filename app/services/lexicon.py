@@ -0,0 +1,115 @@
+"""
+Cue lists of the rule scorers and the one pass over a message they share.
+
+``scan(text)`` normalizes a message once and finds every sentiment,
+negation and urgency cue in it with a single sweep over the distinct
+cues. ``score_sentiment``, ``categorize`` and ``priority_from`` all take
+their normalized key and cue hits from it, and the last few hundred
+scans are kept, so the three calls ``run_agent`` makes for one message
+share one pass. The cues are those of the active rule set (rules.py);
+these constants are the built-in defaults.
+
+Cues match as substrings of the lowercased, space-padded text, exactly
+as the original per-scorer loops did ("late" also matches "related").
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import FrozenSet, Iterable, NamedTuple
+
+from . import rules
+from .nlp_cache import normalize
+
+# Lightweight keyword lexicon
+NEG_CUES = {
+    "not good", "not studying", "not studing", "bad", "poor",
+    "dirty", "smell", "smelly", "issue", "problem", "broken",
+    "delay", "late", "bully", "harass", "unsafe", "hygine", "hygiene",
+    "no water", "water issue", "no wifi", "wifi issue",
+}
+POS_CUES = {"excellent", "very good", "good", "great", "thanks", "thank you", "helpful"}
+NEGATION = " not "
+NEGATED = (" good", " fine", " ok", " studying", " working")
+
+# Words indicating urgency or severity
+URGENCY_WORDS = {"urgent", "immediately", "asap", "unsafe", "emergency", "harass", "bully", "no water", "power cut"}
+
+SCAN_CACHE_SIZE = 1024
+
+class Scan(NamedTuple):
+    norm: str                # lowercased, whitespace collapsed, stripped
+    cues: FrozenSet[str]     # every cue found in " " + norm + " "
+    urgent: bool             # an URGENCY_WORDS cue occurs in the text as given
+
+class Lexicon:
+    def __init__(self, pos: Iterable[str], neg: Iterable[str], urgency: Iterable[str],
+                 negation: str = NEGATION, negated: Iterable[str] = NEGATED):
+        self.pos = frozenset(pos)
+        self.neg = frozenset(neg)
+        self.urgency = frozenset(urgency)
+        self.negation = negation
+        self.negated = frozenset(negated)
+        # Each distinct cue once, whichever lists it is in
+        self._all = tuple(sorted(self.pos | self.neg | self.urgency | self.negated | {negation}))
+        # Multi-word urgency cues are matched against the original spacing
+        self._spaced_urgency = frozenset(c for c in self.urgency if any(ch.isspace() for ch in c))
+        self._word_urgency = self.urgency - self._spaced_urgency
+        self._recent: "OrderedDict[str, Scan]" = OrderedDict()
+        self._recent_lock = threading.Lock()
+
+    def scan(self, text: str) -> Scan:
+        norm = normalize(text)
+        padded = f" {norm} "
+        cues = frozenset(c for c in self._all if c in padded)
+        urgent = not cues.isdisjoint(self._word_urgency)
+        if not urgent and self._spaced_urgency:
+            lowered = (text or "").lower()
+            if lowered == norm:
+                urgent = not cues.isdisjoint(self._spaced_urgency)
+            else:
+                raw = f" {lowered} "
+                urgent = any(c in raw for c in self._spaced_urgency)
+        return Scan(norm, cues, urgent)
+
+    def polarity(self, scan: Scan) -> float:
+        """The score _rule_polarity gives, summed in the same order."""
+        score = 0.0
+        for _ in range(len(scan.cues & self.pos)):
+            score += 0.6
+        for _ in range(len(scan.cues & self.neg)):
+            score -= 0.8
+        # Flip if negation patterns present
+        if self.negation in scan.cues and not scan.cues.isdisjoint(self.negated):
+            score -= 0.5
+        return max(-1.0, min(1.0, score))
+
+    def cached_scan(self, text: str) -> Scan:
+        """scan(text), remembered for the last SCAN_CACHE_SIZE texts. The
+        normalized text is remembered too, since the scorers' caches are
+        keyed on it."""
+        text = text or ""
+        with self._recent_lock:
+            found = self._recent.get(text)
+            if found is not None:
+                self._recent.move_to_end(text)
+                return found
+        found = self.scan(text)
+        with self._recent_lock:
+            self._recent[text] = found
+            if found.norm != text and found.norm not in self._recent:
+                urgent = not found.cues.isdisjoint(self.urgency)
+                self._recent[found.norm] = found if urgent == found.urgent else found._replace(urgent=urgent)
+            while len(self._recent) > SCAN_CACHE_SIZE:
+                self._recent.popitem(last=False)
+        return found
+
+    def clear(self) -> None:
+        with self._recent_lock:
+            self._recent.clear()
+
+def scan(text: str) -> Scan:
+    """The active rule set's cached scan of ``text``."""
+    return rules.active().lexicon.cached_scan(text)
+
+def clear() -> None:
+    rules.active().lexicon.clear()
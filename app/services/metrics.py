@@ -0,0 +1,173 @@
+"""
+In-process metrics in the Prometheus text format, served at ``/metrics``.
+
+Counters and histograms keep one preallocated slot list per label tuple,
+so recording is a bisect and a few integer adds under a lock; nothing is
+allocated per observation once a label combination has been seen. Values
+are per process: with several uvicorn workers, scrape each one.
+
+    METRICS_ENABLED   "false" turns recording and /metrics off, default true
+"""
+from __future__ import annotations
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter as clock  # noqa: F401  (re-exported for callers)
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for labels, v in items:
+            yield f"{self.name}{_labels(self.label_names, labels)} {v}"
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # per label tuple: [count per bucket ..., +Inf count, sum]
+        self._slots: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *labels: str) -> None:
+        if not ENABLED:
+            return
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            slots = self._slots.get(labels)
+            if slots is None:
+                slots = self._slots[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            slots[i] += 1
+            slots[-1] += seconds
+
+    def count(self, *labels: str) -> int:
+        slots = self._slots.get(labels)
+        return int(sum(slots[:-1])) if slots else 0
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(labels, list(slots)) for labels, slots in self._slots.items()]
+        for labels, slots in items:
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), slots):
+                running += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {running}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {running}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {slots[-1]}"
+
+class Gauge:
+    """Read at scrape time from ``fn``, which returns {label tuple: value}."""
+    def __init__(self, name: str, help: str, labels: Sequence[str], fn: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.name, self.help, self.label_names, self.fn = name, help, tuple(labels), fn
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        try:
+            values = self.fn()
+        except Exception:
+            values = {}
+        for labels, v in values.items():
+            yield f"{self.name}{_labels(self.label_names, labels)} {v}"
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+)
+AGENT_STAGE_SECONDS = Histogram(
+    "agent_stage_duration_seconds", "Time spent in each run_agent pipeline stage.", ("stage",), STAGE_BUCKETS
+)
+FEEDBACK_STAGE_SECONDS = Histogram(
+    "feedback_create_stage_duration_seconds", "Time spent in each step of create_feedback_service.",
+    ("stage",), STAGE_BUCKETS,
+)
+RENDER_SECONDS = Histogram(
+    "template_render_duration_seconds", "Jinja template render time.", ("template",), STAGE_BUCKETS
+)
+CLASSIFICATIONS = Counter(
+    "feedback_classifications_total", "Messages classified by the agent.", ("category", "priority")
+)
+
+def _pool_stats() -> Dict[Tuple[str, ...], float]:
+    from ..database import engine
+    pool = engine.pool
+    stats = {}
+    for name in ("size", "checkedout", "checkedin", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            stats[(name,)] = fn()
+    return stats
+
+DB_POOL = Gauge("db_pool_connections", "Connection pool state of the sync engine.", ("state",), _pool_stats)
+
+REGISTRY = [REQUEST_SECONDS, AGENT_STAGE_SECONDS, FEEDBACK_STAGE_SECONDS, RENDER_SECONDS, CLASSIFICATIONS, DB_POOL]
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+def record_classifications(results: Iterable[dict]) -> None:
+    if not ENABLED:
+        return
+    for out in results:
+        CLASSIFICATIONS.inc(out.get("category", "General"), out.get("priority", "low"))
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request, labelled by the matched
+    route's path template (``/feedback/department/{dept_id}``), so label
+    cardinality stays bounded.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+        started = clock()
+        status = ["500"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(clock() - started, scope["method"], path, status[0])
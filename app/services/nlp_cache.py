@@ -0,0 +1,109 @@
+"""
+Bounded, thread-safe LRU/TTL cache for the NLP scorers, keyed by
+normalized text (lowercased, whitespace collapsed). Parents resend the
+same short messages ("thank you", "no water") all the time; those skip
+TextBlob and fuzzy matching entirely.
+
+    NLP_CACHE_SIZE  entries per cache (0 disables caching), default 10000
+    NLP_CACHE_TTL   seconds an entry stays valid (0 = no expiry), default 0
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+CACHE_SIZE = int(os.getenv("NLP_CACHE_SIZE", "10000"))
+CACHE_TTL = float(os.getenv("NLP_CACHE_TTL", "0"))
+
+def normalize(text: str) -> str:
+    # str.split() and re's \s agree on what is whitespace; split/join is
+    # several times faster than re.sub(r"\s+", " ", ...).strip()
+    return " ".join((text or "").lower().split())
+
+class LRUCache:
+    def __init__(self, name: str, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        if self.maxsize <= 0:
+            return compute()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (not self.ttl or now - entry[0] < self.ttl):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        # Compute outside the lock; a concurrent miss on the same key just
+        # computes the same value twice.
+        value = compute()
+        with self._lock:
+            self._data[key] = (now, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def get_or_compute_many(self, keys: List[Hashable], compute_many: Callable[[List[Hashable]], List[Any]]) -> List[Any]:
+        """Values for ``keys``; the distinct misses go to one ``compute_many`` call."""
+        if self.maxsize <= 0:
+            return list(compute_many(list(keys)))
+        now = time.monotonic()
+        out: List[Any] = [None] * len(keys)
+        missing: Dict[Hashable, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._data.get(key)
+                if entry is not None and (not self.ttl or now - entry[0] < self.ttl):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    out[i] = entry[1]
+                elif key in missing:
+                    self.hits += 1
+                    missing[key].append(i)
+                else:
+                    self.misses += 1
+                    missing[key] = [i]
+        if not missing:
+            return out
+        values = compute_many(list(missing))
+        with self._lock:
+            for (key, positions), value in zip(missing.items(), values):
+                self._data[key] = (now, value)
+                self._data.move_to_end(key)
+                for i in positions:
+                    out[i] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            }
+
+sentiment_cache = LRUCache("sentiment")
+category_cache = LRUCache("category")
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {c.name: c.stats() for c in (sentiment_cache, category_cache)}
+
+def clear_caches() -> None:
+    for c in (sentiment_cache, category_cache):
+        c.clear()
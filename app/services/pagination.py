@@ -0,0 +1,110 @@
+from __future__ import annotations
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, List, Sequence, Tuple
+from sqlalchemy import Integer, String, func, literal, tuple_, type_coerce
+from sqlalchemy.orm import Query, Session
+from .. import models, schemas
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+CURSOR_KEY = "cursor_key"
+
+FEEDBACK_FIELDS: List[str] = list(schemas.FeedbackOut.model_fields)
+
+def _filtered(q: Query, filters: dict) -> Query:
+    for column, value in filters.items():
+        if value:
+            q = q.filter(getattr(models.Feedback, column) == value)
+    return q
+
+def feedback_query(db: Session, fields: List[str] | None = None, **filters) -> Query:
+    """
+    Plain-column Feedback rows (no ORM identity-map bookkeeping) with the
+    given equality filters; falsy filter values are ignored. ``id`` is
+    always selected because the cursor needs it.
+    """
+    keys = list(dict.fromkeys((fields or FEEDBACK_FIELDS) + ["id"]))
+    return _filtered(db.query(*[getattr(models.Feedback, f) for f in keys]), filters)
+
+def feedback_page(db: Session, cursor: str | None, limit: int, fields: List[str] | None = None, **filters):
+    """One newest-first page and the cursor for the next. ValueError on a bad cursor."""
+    q = keyset_page(feedback_query(db, fields, **filters), cursor, limit)
+    return split_page(q.all(), limit)
+
+def count_feedback(db: Session, **filters) -> int:
+    return _filtered(db.query(func.count(models.Feedback.id)), filters).scalar() or 0
+
+def _sort_key(dialect: str):
+    # SQLite keeps timestamps as text and orders them as text. Comparing the
+    # raw stored value keeps the cursor filter consistent with ORDER BY,
+    # whichever format ('... 12:00:00' or '... 12:00:00.000000') a row has.
+    if dialect == "sqlite":
+        return type_coerce(models.Feedback.created_at, String)
+    return models.Feedback.created_at
+
+def timestamp_literal(dialect: str, value: datetime, type_):
+    """
+    Bind a datetime for comparison with created_at/updated_at. On SQLite a
+    whole-second value is sent as 'YYYY-MM-DD HH:MM:SS', the format
+    CURRENT_TIMESTAMP writes, so equal timestamps compare equal as text.
+    """
+    if dialect == "sqlite":
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        fmt = "%Y-%m-%d %H:%M:%S.%f" if value.microsecond else "%Y-%m-%d %H:%M:%S"
+        return literal(value.strftime(fmt), String)
+    return literal(value, type_)
+
+def encode_cursor(created_at: datetime | str, fb_id: int) -> str:
+    value = created_at if isinstance(created_at, str) else created_at.isoformat()
+    raw = json.dumps([value, fb_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Raises ValueError on anything that is not a cursor we issued."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, fb_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(created_at, str):
+            raise TypeError(created_at)
+        return created_at, int(fb_id)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+def keyset_page(q: Query, cursor: str | None, limit: int) -> Query:
+    """
+    Newest-first page of a Feedback query, keyed on (created_at, id).
+    Rows inserted after the cursor was issued sort before it, so later
+    pages never shift or repeat. Each row gets an extra ``cursor_key``
+    column for split_page().
+    """
+    fb = models.Feedback
+    dialect = q.session.get_bind().dialect.name
+    key = _sort_key(dialect)
+    if cursor:
+        created_at, fb_id = decode_cursor(cursor)
+        if dialect == "sqlite":
+            bound = literal(created_at, String)
+        else:
+            try:
+                bound = literal(datetime.fromisoformat(created_at), fb.created_at.type)
+            except ValueError as e:
+                raise ValueError("invalid cursor") from e
+        q = q.filter(tuple_(key, fb.id) < tuple_(bound, literal(fb_id, Integer)))
+    return (
+        q.add_columns(key.label(CURSOR_KEY))
+        .order_by(fb.created_at.desc(), fb.id.desc())
+        .limit(limit + 1)
+    )
+
+def split_page(rows: Sequence[Any], limit: int) -> Tuple[List[Any], str | None]:
+    """Trim the look-ahead row and return (rows, next_cursor)."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, CURSOR_KEY), last.id)
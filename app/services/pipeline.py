@@ -0,0 +1,87 @@
+from __future__ import annotations
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List
+
+Stage = Callable[[str], Any]
+Combine = Callable[[Dict[str, Any]], Dict[str, Any]]
+Observe = Callable[[float, str], None]
+
+class Pipeline:
+    """
+    Named stages run on each message in order, then ``combine`` turns
+    ``{stage name: output, "message": message}`` into the result.
+
+    Stages are plain calls, with no thread or Runnable dispatch per message;
+    batches get their parallelism from run_many() on a process pool. Stage
+    and combine functions are pickled by reference for the pool, so they
+    must be importable module-level functions. A stage function with a
+    ``many`` attribute is given run_many()'s whole batch through it.
+
+    ``observe(seconds, stage)``, if set, is called with the duration of each
+    stage and of "combine" (for a batched stage, its per-message average).
+    It stays in this process: pool workers get a copy of the pipeline
+    without it.
+    """
+
+    def __init__(self, stages: Dict[str, Stage] | None = None, combine: Combine | None = None,
+                 observe: Observe | None = None):
+        self.stages: Dict[str, Stage] = dict(stages or {})
+        self.combine = combine
+        self.observe = observe
+
+    def __getstate__(self):
+        return {**self.__dict__, "observe": None}
+
+    def add_stage(self, name: str, fn: Stage) -> "Pipeline":
+        """Add a stage, or replace the one with the same name."""
+        if name == "message":
+            raise ValueError("'message' is reserved for the input text")
+        self.stages[name] = fn
+        return self
+
+    def remove_stage(self, name: str) -> None:
+        self.stages.pop(name, None)
+
+    def outputs(self, message: str) -> Dict[str, Any]:
+        observe = self.observe
+        if observe is None:
+            out = {name: fn(message) for name, fn in self.stages.items()}
+        else:
+            out = {}
+            for name, fn in self.stages.items():
+                started = perf_counter()
+                out[name] = fn(message)
+                observe(perf_counter() - started, name)
+        out["message"] = message
+        return out
+
+    def _finish(self, out: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.combine:
+            return out
+        if self.observe is None:
+            return self.combine(out)
+        started = perf_counter()
+        result = self.combine(out)
+        self.observe(perf_counter() - started, "combine")
+        return result
+
+    def run(self, message: str) -> Dict[str, Any]:
+        return self._finish(self.outputs(message))
+
+    def run_many(self, messages: Iterable[str]) -> List[Dict[str, Any]]:
+        messages = list(messages)
+        if not messages:
+            return []
+        columns: Dict[str, List[Any]] = {}
+        for name, fn in self.stages.items():
+            started = perf_counter()
+            many = getattr(fn, "many", None)
+            columns[name] = many(messages) if many is not None else [fn(m) for m in messages]
+            if self.observe is not None:
+                each = (perf_counter() - started) / len(messages)
+                for _ in messages:
+                    self.observe(each, name)
+        return [
+            self._finish({**{name: col[i] for name, col in columns.items()}, "message": m})
+            for i, m in enumerate(messages)
+        ]
@@ -0,0 +1,300 @@
+"""
+Re-run the classifier over stored feedback after the heuristics in
+categorizer.py / sentiment.py or the routing rules change.
+
+A job walks ``feedback`` in primary-key order, ``chunk_size`` rows at a
+time, up to the highest id that existed when it started; newer rows were
+classified by the current code already. Each chunk goes through
+run_agent_batch, on the process pool with RECLASSIFY_WORKERS > 1, and
+only rows whose outputs changed are written back: one executemany UPDATE
+plus their rollup deltas. The chunk's writes and the job's checkpoint
+(``last_id``) commit together, so a job that is paused, stopped by a
+shutdown or killed resumes after its last committed chunk and never
+applies a rollup change twice.
+
+Scope ``all`` re-runs every row; ``stale`` only rows classified under
+another rules version than the active one (see rules_store.py).
+
+Live traffic comes first: after each chunk the job sleeps long enough to
+be busy at most RECLASSIFY_DUTY of the time.
+
+    RECLASSIFY_CHUNK_SIZE     rows per chunk, default 1000
+    RECLASSIFY_WORKERS        1 classifies in-process, more uses the shared
+                              pool; default half the CPUs
+    RECLASSIFY_DUTY           fraction of wall time spent working, default 0.5
+    RECLASSIFY_STALE_SECONDS  a running job without a checkpoint for this
+                              long is presumed dead and can be resumed,
+                              default 300
+
+    python -m app.services.reclassify --scope all
+    python -m app.services.reclassify --resume 3
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import bindparam, func, or_, select, update
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import SessionLocal
+from . import analytics, departments, pagination, rules
+from .analysis_queue import PENDING_ANALYSIS
+from .routing_agent import run_agent_batch
+
+CHUNK_SIZE = int(os.getenv("RECLASSIFY_CHUNK_SIZE", "1000"))
+WORKERS = int(os.getenv("RECLASSIFY_WORKERS", str(max(1, (os.cpu_count() or 1) // 2))))
+DUTY = float(os.getenv("RECLASSIFY_DUTY", "0.5"))
+STALE_SECONDS = float(os.getenv("RECLASSIFY_STALE_SECONDS", "300"))
+
+SCOPES = ("all", "stale")
+RUNNING, PAUSED, FAILED, DONE = "running", "paused", "failed", "done"
+
+# Classifier outputs stored on a feedback row
+OUTPUT_FIELDS = ("sentiment", "sentiment_score", "sentiment_confidence", "category", "priority", "department")
+# Written only if still as read: they (and status) drive the rollups
+GUARDED = ("category", "department", "sentiment", "priority", "rules_version")
+
+def select_chunk(db: Session, after_id: int, max_id: int, limit: int, stale_version: Optional[int] = None):
+    """Up to ``limit`` classified rows with after_id < id <= max_id, by id;
+    with ``stale_version``, only rows classified under another version."""
+    fb = models.Feedback
+    columns = {"id", "message", "created_at", "rules_version", *OUTPUT_FIELDS, *analytics.DIMENSIONS}
+    query = (
+        select(*[getattr(fb, c) for c in sorted(columns)])
+        .where(fb.id > after_id, fb.id <= max_id, fb.status != PENDING_ANALYSIS)
+    )
+    if stale_version is not None:
+        query = query.where(or_(fb.rules_version.is_(None), fb.rules_version != stale_version))
+    return db.execute(query.order_by(fb.id.asc()).limit(limit)).all()
+
+def write_back(db: Session, rows, outs: List[Dict[str, Any]]) -> int:
+    """
+    Store the outputs in ``outs`` that differ from ``rows`` and move their
+    rollup counts; rows with the same outputs under a new rules version
+    only get the version, without touching updated_at. A row changed by
+    someone else since it was read is left alone. Returns rows rewritten.
+    Does not commit.
+    """
+    fb = models.Feedback
+    dept_ids = departments.registry.ids_by_name(db)
+    changed, versioned = [], []
+    for r, out in zip(rows, outs):
+        seen = {"_id": r.id, **{f"_{f}": getattr(r, f) for f in GUARDED}}
+        new = {f: out[f] for f in OUTPUT_FIELDS}
+        if any(getattr(r, f) != new[f] for f in OUTPUT_FIELDS):
+            changed.append({
+                **seen, **new,
+                "department_id": dept_ids.get(new["department"]),
+                "rules_version": out.get("rules_version"),
+            })
+        elif r.rules_version != out.get("rules_version"):
+            versioned.append({**seen, "rules_version": out.get("rules_version")})
+
+    guard = [fb.id == bindparam("_id"), *[getattr(fb, f).is_not_distinct_from(bindparam(f"_{f}")) for f in GUARDED]]
+    conn = db.connection()
+    if changed:
+        stmt = (
+            update(fb).where(*guard)
+            .values({k: bindparam(k) for k in changed[0] if not k.startswith("_")})
+            .execution_options(synchronize_session=False)
+        )
+        if not conn.dialect.supports_sane_multi_rowcount or conn.execute(stmt, changed).rowcount != len(changed):
+            # Raced with another writer (or the driver cannot tell): apply
+            # row by row so only our own updates reach the rollups
+            db.rollback()
+            conn = db.connection()
+            changed = [p for p in changed if conn.execute(stmt, [p]).rowcount == 1]
+        by_id = {r.id: r for r in rows}
+        deltas: Counter = Counter()
+        for p in changed:
+            r = by_id[p["_id"]]
+            old = {d: getattr(r, d) for d in analytics.DIMENSIONS}
+            deltas.update(analytics.deltas_for(r.created_at, old, {**old, **{f: p[f] for f in OUTPUT_FIELDS}}))
+        analytics.apply_deltas(db, deltas)
+    if versioned:
+        conn.execute(
+            update(fb).where(*guard)
+            .values(rules_version=bindparam("rules_version"), updated_at=fb.updated_at)
+            .execution_options(synchronize_session=False),
+            versioned,
+        )
+    return len(changed)
+
+def create(db: Session, scope: str = "all", chunk_size: int = CHUNK_SIZE) -> models.ReclassifyJob:
+    """A new job, in status running, covering the rows stored so far."""
+    if scope not in SCOPES:
+        raise ValueError(f"scope must be one of {', '.join(SCOPES)}")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    max_id = db.execute(select(func.max(models.Feedback.id))).scalar() or 0
+    job = models.ReclassifyJob(scope=scope, status=RUNNING, chunk_size=chunk_size, max_id=max_id,
+                               last_id=0, scanned=0, changed=0)
+    db.add(job)
+    db.commit()
+    return job
+
+def _stale_cutoff(db: Session):
+    cutoff = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(seconds=STALE_SECONDS)
+    job = models.ReclassifyJob
+    return pagination.timestamp_literal(db.get_bind().dialect.name, cutoff, job.updated_at.type)
+
+def active_job(db: Session) -> Optional[models.ReclassifyJob]:
+    """The running job that checkpointed within RECLASSIFY_STALE_SECONDS, if any."""
+    job = models.ReclassifyJob
+    return db.execute(
+        select(job)
+        .where(job.status == RUNNING, func.coalesce(job.updated_at, job.created_at) >= _stale_cutoff(db))
+        .order_by(job.id.desc()).limit(1)
+    ).scalar_one_or_none()
+
+def pause(db: Session, job_id: int) -> bool:
+    """Ask a running job to stop after its current chunk."""
+    job = models.ReclassifyJob
+    done = db.execute(update(job).where(job.id == job_id, job.status == RUNNING).values(status=PAUSED)).rowcount
+    db.commit()
+    return done == 1
+
+def claim(db: Session, job_id: int) -> bool:
+    """Mark a paused, failed or abandoned job running again; False if it is
+    done, unknown, or still being run somewhere."""
+    job = models.ReclassifyJob
+    resumable = or_(
+        job.status.in_((PAUSED, FAILED)),
+        (job.status == RUNNING) & (func.coalesce(job.updated_at, job.created_at) < _stale_cutoff(db)),
+    )
+    done = db.execute(
+        update(job).where(job.id == job_id, resumable).values(status=RUNNING, error=None)
+    ).rowcount
+    db.commit()
+    return done == 1
+
+def run(job_id: int, workers: int = WORKERS, duty: float = DUTY,
+        stop: Optional[threading.Event] = None, log=print) -> Dict[str, Any]:
+    """
+    Work through a running job from its checkpoint until it is done, paused
+    (here via ``stop``, or through ``pause`` from anywhere) or fails.
+    Returns the job's final counters.
+    """
+    stop = stop or threading.Event()
+    db = SessionLocal()
+    try:
+        job = db.get(models.ReclassifyJob, job_id)
+        if job is None:
+            raise ValueError(f"no reclassify job {job_id}")
+        try:
+            while job.status == RUNNING:
+                if stop.is_set():
+                    job.status = PAUSED
+                    db.commit()
+                    break
+                stale_version = rules.active().version if job.scope == "stale" else None
+                rows = []
+                if job.scope == "all" or stale_version is not None:
+                    rows = select_chunk(db, job.last_id, job.max_id, job.chunk_size, stale_version)
+                if not rows:
+                    job.status, job.finished_at = DONE, func.now()
+                    db.commit()
+                    break
+
+                started = time.perf_counter()
+                outs = run_agent_batch([{"message": r.message} for r in rows], workers=workers)
+                changed = write_back(db, rows, outs)
+                job.last_id = rows[-1].id
+                job.scanned += len(rows)
+                job.changed += changed
+                db.commit()
+                took = time.perf_counter() - started
+                log(f"job {job_id}: id<={job.last_id}/{job.max_id} scanned={job.scanned} "
+                    f"changed={job.changed} chunk={took:.2f}s")
+                # Idle long enough to stay within the duty cycle
+                if 0 < duty < 1:
+                    stop.wait(took * (1 - duty) / duty)
+        except BaseException as e:
+            # The failed chunk rolls back; the checkpoint is before it
+            db.rollback()
+            if isinstance(e, KeyboardInterrupt):
+                job.status = PAUSED
+            else:
+                job.status, job.error = FAILED, f"{type(e).__name__}: {e}"[:500]
+            db.commit()
+            raise
+        return as_dict(job)
+    finally:
+        db.close()
+
+def as_dict(job: models.ReclassifyJob) -> Dict[str, Any]:
+    return {c.name: getattr(job, c.name) for c in models.ReclassifyJob.__table__.columns}
+
+_threads: Dict[int, threading.Thread] = {}
+_threads_lock = threading.Lock()
+_stop = threading.Event()
+
+def start_background(job_id: int, workers: int = WORKERS, duty: float = DUTY) -> None:
+    """run(job_id) on a daemon thread of this process."""
+    def target():
+        try:
+            run(job_id, workers, duty, stop=_stop)
+        except Exception as e:
+            print(f"❌ Reclassify job {job_id} failed: {e}")
+        finally:
+            with _threads_lock:
+                _threads.pop(job_id, None)
+
+    with _threads_lock:
+        if job_id in _threads:
+            return
+        thread = _threads[job_id] = threading.Thread(target=target, name=f"reclassify-{job_id}", daemon=True)
+    thread.start()
+
+def shutdown(timeout: float = 30) -> None:
+    """Pause this process's jobs after their current chunk (resumable)."""
+    _stop.set()
+    with _threads_lock:
+        threads = list(_threads.values())
+    for thread in threads:
+        thread.join(timeout)
+    _stop.clear()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.services.reclassify",
+                                     description="Re-run classification over stored feedback.")
+    parser.add_argument("--scope", choices=SCOPES, default="all")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--duty", type=float, default=DUTY, help="fraction of time spent working (1 = no pauses)")
+    parser.add_argument("--resume", type=int, metavar="JOB_ID", help="continue a paused, failed or abandoned job")
+    args = parser.parse_args(argv)
+
+    from ..database import engine
+    from ..migrations import upgrade
+    from . import rules_store
+    from .routing_agent import shutdown_pool
+
+    upgrade(engine)
+    with SessionLocal() as db:
+        rules_store.seed_defaults(db)
+        rules_store.refresh(db)
+        if args.resume is not None:
+            if not claim(db, args.resume):
+                parser.error(f"job {args.resume} is unknown, done or still running")
+            job_id = args.resume
+        else:
+            job_id = create(db, args.scope, args.chunk_size).id
+    try:
+        summary = run(job_id, args.workers, args.duty, log=lambda m: print(m, file=sys.stderr))
+    except KeyboardInterrupt:
+        print(f"paused; resume with --resume {job_id}", file=sys.stderr)
+        return 130
+    finally:
+        shutdown_pool()
+    print(json.dumps(summary, default=str))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,20 +1,32 @@
 from __future__ import annotations
-from typing import Dict, Any
-from langchain_core.runnables import RunnableLambda, RunnableParallel
+from typing import Dict, Any, List
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 from .sentiment import score_sentiment
 from .categorizer import categorize, priority_from
+from . import metrics, rules
+from .pipeline import Pipeline
 
-# Nodes
-_sentiment_node = RunnableLambda(lambda x: {"sent": score_sentiment(x["message"])})
-_category_node  = RunnableLambda(lambda x: {"cat": categorize(x["message"])})
+# Batches at least this large are spread over a process pool
+BATCH_POOL_THRESHOLD = int(os.getenv("AGENT_BATCH_POOL_THRESHOLD", "512"))
+BATCH_WORKERS = int(os.getenv("AGENT_BATCH_WORKERS", str(os.cpu_count() or 1)))
+BATCH_CHUNK_SIZE = 256
 
-# Run in parallel
-_parallel = RunnableParallel(**{"sent": _sentiment_node, "cat": _category_node})
+# "native" runs the pipeline stages as plain calls; "langchain" wraps the same
+# stages in a RunnableParallel graph. LangChain is only imported on first use,
+# and the native path is used when it is not installed.
+AGENT_BACKEND = os.getenv("AGENT_BACKEND", "native").strip().lower()
+
+# Output keys filled by _combine; other stages' dict outputs are merged in
+_CORE_STAGES = ("sentiment", "category")
 
 def _combine(outputs: Dict[str, Any]) -> Dict[str, Any]:
-    sent: Dict[str, Any] = outputs["sent"]["sent"]
-    cat: Dict[str, Any]  = outputs["cat"]["cat"]
+    sent: Dict[str, Any] = outputs["sentiment"]
+    cat: Dict[str, Any]  = outputs["category"]
 
     sentiment_label = sent.get("label", "neutral")
     category = cat.get("category", "General")
@@ -22,36 +34,153 @@ def _combine(outputs: Dict[str, Any]) -> Dict[str, Any]:
 
     prio = priority_from(sentiment_label, hits, outputs.get("message", ""), category)
 
-    return {
+    result = {
         "sentiment": sentiment_label,
         "sentiment_score": sent.get("score", 0.0),
         "sentiment_confidence": sent.get("confidence", 0.5),
         "category": category,
         "department": cat.get("department", "Student Affairs"),
         "priority": prio,
+        "rules_version": rules.active().version,
     }
+    for name, out in outputs.items():
+        if name not in _CORE_STAGES and isinstance(out, dict):
+            result.update(out)
+    return result
 
-_combine_node = RunnableLambda(_combine)
+# Nodes: sentiment and category, combined by _combine
+pipeline = Pipeline(
+    {"sentiment": score_sentiment, "category": categorize},
+    _combine,
+    observe=metrics.AGENT_STAGE_SECONDS.observe if metrics.ENABLED else None,
+)
 
-# Full chain
-def _inject_message(x: Dict[str, Any]) -> Dict[str, Any]:
-    out = _parallel.invoke(x)
-    out["message"] = x.get("message", "")
-    return out
+def register_stage(name: str, fn) -> None:
+    """Plug an extra stage into the agent. Its dict output is merged into
+    every result; use a module-level function so pooled batches can run it."""
+    pipeline.add_stage(name, fn)
+    global _chain
+    _chain = None
+
+def _build_chain(pipe: Pipeline):
+    from langchain_core.runnables import RunnableLambda, RunnableParallel
+
+    # Run the stages in parallel
+    _parallel = RunnableParallel(**{
+        name: RunnableLambda(lambda x, fn=fn: fn(x["message"]))
+        for name, fn in pipe.stages.items()
+    })
+
+    # Full chain
+    def _inject_message(x: Dict[str, Any]) -> Dict[str, Any]:
+        out = _parallel.invoke(x)
+        out["message"] = x.get("message", "")
+        return out
+
+    return RunnableLambda(_inject_message) | RunnableLambda(pipe.combine)
+
+_chain = None
+_chain_lock = threading.Lock()
+
+def _get_chain():
+    """The LangChain graph, built on first use; None when the native
+    backend is selected or langchain_core is not installed."""
+    global _chain
+    if _chain is None and AGENT_BACKEND == "langchain":
+        with _chain_lock:
+            if _chain is None:
+                try:
+                    _chain = _build_chain(pipeline)
+                except ImportError:
+                    _chain = False
+    return _chain or None
+
+def _empty_result() -> Dict[str, Any]:
+    return {
+        "sentiment": "neutral",
+        "sentiment_score": 0.0,
+        "sentiment_confidence": 0.35,
+        "category": "General",
+        "department": "Student Affairs",
+        "priority": "low",
+        "rules_version": rules.active().version,
+    }
 
-_chain = RunnableLambda(_inject_message) | _combine_node
+def _has_message(payload: Dict[str, Any]) -> bool:
+    return "message" in payload and bool(str(payload["message"]).strip())
 
 def run_agent(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Run the heuristic agent on a payload dict
     """
-    if "message" not in payload or not str(payload["message"]).strip():
-        return {
-            "sentiment": "neutral",
-            "sentiment_score": 0.0,
-            "sentiment_confidence": 0.35,
-            "category": "General",
-            "department": "Student Affairs",
-            "priority": "low",
-        }
-    return _chain.invoke(payload)
\ No newline at end of file
+    if not _has_message(payload):
+        return _empty_result()
+    chain = _get_chain()
+    while True:
+        # New rules may be installed mid-message; redo it so every output
+        # (and the rules_version reported) comes from one rule set
+        rule_set = rules.active()
+        out = pipeline.run(payload["message"]) if chain is None else chain.invoke(payload)
+        if rules.active() is rule_set:
+            break
+    metrics.record_classifications((out,))
+    return out
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared worker pool, created on first use. Workers are spawned, not
+    forked, so they never inherit the server's threads or DB connections."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+def _run_chunk(pipe: Pipeline, spec, messages: List[str]) -> List[Dict[str, Any]]:
+    """Pool task: run_many under the parent's rule set."""
+    rules.ensure(spec)
+    return pipe.run_many(messages)
+
+def run_agent_batch(payloads: List[Dict[str, Any]], workers: int | None = None) -> List[Dict[str, Any]]:
+    """
+    Run the agent over many payloads; results are in input order and equal
+    to calling run_agent on each payload. ``workers`` sizes the shared pool
+    when it is first created; 1 keeps everything in-process.
+    """
+    results: List[Dict[str, Any] | None] = [None] * len(payloads)
+    todo_idx: List[int] = []
+    todo_msg: List[str] = []
+    for i, payload in enumerate(payloads):
+        if _has_message(payload):
+            todo_idx.append(i)
+            todo_msg.append(payload["message"])
+        else:
+            results[i] = _empty_result()
+
+    workers = BATCH_WORKERS if workers is None else workers
+    use_pool = workers > 1 and len(todo_msg) >= BATCH_POOL_THRESHOLD
+    while True:
+        rule_set = rules.active()
+        if use_pool:
+            chunks = [todo_msg[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(todo_msg), BATCH_CHUNK_SIZE)]
+            pool = _get_pool(workers)
+            mapped = pool.map(_run_chunk, repeat(pipeline), repeat(rule_set.spec), chunks)
+            analyzed = [out for chunk in mapped for out in chunk]
+        else:
+            analyzed = pipeline.run_many(todo_msg)
+        if rules.active() is rule_set:
+            break
+
+    for i, out in zip(todo_idx, analyzed):
+        results[i] = out
+    metrics.record_classifications(analyzed)
+    return results  # type: ignore[return-value]
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""
+The routing rules in effect: category keywords, urgency words and the
+sentiment cues, compiled into a ``KeywordMatcher`` and a ``Lexicon``.
+
+A ``RuleSet`` is compiled once and never changed, and ``active()`` hands
+out a single reference to the current one. Installing new rules compiles
+them first (on the caller's thread, which for stored rules is the
+rules_store watcher) and then swaps that reference, so requests already
+running finish on the set they started with and nothing waits on a lock.
+``run_agent`` re-runs a message if the set changed under it, which keeps
+every result, and the rules version it reports, from a single set.
+
+Stored versions live in the ``rule_sets`` table (see rules_store.py);
+version None is the built-in defaults in categorizer.py and lexicon.py,
+in effect until a stored version is loaded.
+"""
+from __future__ import annotations
+import hashlib
+import itertools
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+RULE_KEYS = ("category_keywords", "urgency_words", "pos_cues", "neg_cues")
+
+_generations = itertools.count(1)
+
+def _terms(values: Any, what: str) -> List[str]:
+    if isinstance(values, str) or not isinstance(values, Iterable):
+        raise ValueError(f"{what} must be a list of strings")
+    out = []
+    for v in values:
+        if not isinstance(v, str):
+            raise ValueError(f"{what} must be a list of strings")
+        # Messages are matched lowercased with whitespace collapsed
+        term = " ".join(v.lower().split())
+        if not term:
+            raise ValueError(f"{what} contains an empty entry")
+        if term not in out:
+            out.append(term)
+    return out
+
+def validate(data: Dict[str, Any]) -> Dict[str, Any]:
+    """The rules in ``data`` in canonical form (lowercased, de-duplicated,
+    sorted word lists); ValueError if a key is missing or malformed."""
+    missing = [k for k in RULE_KEYS if k not in data]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    keywords = data["category_keywords"]
+    if not isinstance(keywords, dict) or not keywords:
+        raise ValueError("category_keywords must map category names to keyword lists")
+    categories: Dict[str, List[str]] = {}
+    for name, words in keywords.items():
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("category names must be non-empty strings")
+        # Category order breaks ties between equal hit counts, so it is kept
+        categories[name.strip()] = _terms(words, f"category_keywords[{name!r}]")
+    return {
+        "category_keywords": categories,
+        **{k: sorted(_terms(data[k], k)) for k in RULE_KEYS[1:]},
+    }
+
+def checksum(rules: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(rules, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+class RuleSet:
+    """One version of the rules, compiled. Treat as read-only."""
+
+    def __init__(self, version: Optional[int], rules: Dict[str, Any]):
+        from .categorizer import KeywordMatcher
+        from .lexicon import Lexicon
+
+        self.version = version
+        self.rules = validate(rules)
+        self.checksum = checksum(self.rules)
+        # Distinguishes sets in the scorers' caches, even two of one version
+        self.generation = next(_generations)
+        self.matcher = KeywordMatcher(self.rules["category_keywords"])
+        self.lexicon = Lexicon(self.rules["pos_cues"], self.rules["neg_cues"], self.rules["urgency_words"])
+
+    @property
+    def spec(self) -> Tuple[Optional[int], str, Dict[str, Any]]:
+        """What ``ensure`` needs to rebuild this set in another process."""
+        return self.version, self.checksum, self.rules
+
+    def __repr__(self) -> str:
+        return f"<RuleSet version={self.version} {self.checksum[:8]}>"
+
+def defaults() -> Dict[str, Any]:
+    from .categorizer import CATEGORY_KEYWORDS
+    from .lexicon import NEG_CUES, POS_CUES, URGENCY_WORDS
+
+    return {
+        "category_keywords": CATEGORY_KEYWORDS,
+        "urgency_words": URGENCY_WORDS,
+        "pos_cues": POS_CUES,
+        "neg_cues": NEG_CUES,
+    }
+
+_active: RuleSet | None = None
+_install_lock = threading.Lock()
+
+def active() -> RuleSet:
+    """The rules in effect. Read it once and use that set for the whole message."""
+    current = _active
+    if current is None:
+        with _install_lock:
+            if _active is None:
+                _swap(RuleSet(None, defaults()))
+            current = _active
+    return current
+
+def _swap(new: RuleSet) -> None:
+    global _active
+    _active = new
+
+def install(rule_set: RuleSet) -> RuleSet:
+    """Make an already compiled set the active one."""
+    with _install_lock:
+        _swap(rule_set)
+    return rule_set
+
+def ensure(spec: Tuple[Optional[int], str, Dict[str, Any]]) -> RuleSet:
+    """Activate the set described by ``spec`` unless it already is active
+    (pool workers call this with their parent's set before each chunk)."""
+    version, digest, rules = spec
+    current = active()
+    if current.version == version and current.checksum == digest:
+        return current
+    return install(RuleSet(version, rules))
+
+def reset() -> None:
+    """Back to the built-in defaults."""
+    install(RuleSet(None, defaults()))
@@ -0,0 +1,159 @@
+"""
+Published versions of the routing rules, kept in the ``rule_sets`` table.
+
+``publish`` stores a new version and installs it in the calling process.
+Every other process picks it up within RULES_POLL_SECONDS. A watcher
+thread polls for a newer version, compiles it and then swaps it in
+(rules.install), so no request waits on a rebuild.
+
+Each feedback row records the version it was classified with. After a
+change, a reclassify job with scope "stale" re-runs the rows classified
+under another version (``start_reclassify``, or
+``python -m app.services.reclassify --scope stale``).
+
+    RULES_POLL_SECONDS      how often to look for a new version, default 5
+
+    python -m app.services.rules_store show
+    python -m app.services.rules_store publish rules.json --note "add library"
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import SessionLocal
+from . import reclassify, rules
+
+POLL_SECONDS = float(os.getenv("RULES_POLL_SECONDS", "5"))
+
+def latest(db: Session) -> Optional[models.RuleSetVersion]:
+    return db.execute(
+        select(models.RuleSetVersion).order_by(models.RuleSetVersion.id.desc()).limit(1)
+    ).scalar_one_or_none()
+
+def latest_version(db: Session) -> Optional[int]:
+    return db.execute(select(func.max(models.RuleSetVersion.id))).scalar()
+
+def load(db: Session, version: Optional[int] = None) -> Optional[rules.RuleSet]:
+    """Compile a stored version (default the latest); None if there is none."""
+    row = latest(db) if version is None else db.get(models.RuleSetVersion, version)
+    return None if row is None else rules.RuleSet(row.id, json.loads(row.rules))
+
+def publish(db: Session, data: Dict[str, Any], note: Optional[str] = None) -> rules.RuleSet:
+    """
+    Store ``data`` as the next version and install it here. Publishing the
+    rules already in effect adds no version. ValueError if ``data`` is not
+    a valid rule set.
+    """
+    canonical = rules.validate(data)
+    digest = rules.checksum(canonical)
+    current = latest(db)
+    if current is not None and current.checksum == digest:
+        version = current.id
+    else:
+        row = models.RuleSetVersion(rules=json.dumps(canonical), checksum=digest, note=note)
+        db.add(row)
+        db.commit()
+        version = row.id
+    rule_set = rules.active()
+    if rule_set.version != version or rule_set.checksum != digest:
+        rule_set = rules.install(rules.RuleSet(version, canonical))
+    return rule_set
+
+def seed_defaults(db: Session) -> None:
+    """Store the built-in rules as version 1 on an empty table."""
+    if latest_version(db) is None:
+        publish(db, rules.defaults(), note="built-in defaults")
+
+def refresh(db: Session) -> bool:
+    """Install the latest stored version if it is not the active one."""
+    version = latest_version(db)
+    if version is None or version == rules.active().version:
+        return False
+    rule_set = load(db, version)
+    if rule_set is None:
+        return False
+    rules.install(rule_set)
+    return True
+
+def start_reclassify(db: Session) -> int:
+    """Start a background job re-running the rows classified under another
+    version (see reclassify.py), replacing any such job still running."""
+    running = reclassify.active_job(db)
+    if running is not None and running.scope == "stale":
+        reclassify.pause(db, running.id)
+    job = reclassify.create(db, scope="stale")
+    reclassify.start_background(job.id)
+    return job.id
+
+class _Watcher(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name="rules-watcher", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            db = SessionLocal()
+            try:
+                if refresh(db):
+                    print(f"🔁 Routing rules v{rules.active().version} installed")
+            except Exception as e:
+                print(f"❌ Rules watcher error: {e}")
+            finally:
+                db.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+_watcher: _Watcher | None = None
+
+def start_watcher(interval: float = POLL_SECONDS) -> None:
+    global _watcher
+    if interval > 0 and (_watcher is None or not _watcher.is_alive()):
+        _watcher = _Watcher(interval)
+        _watcher.start()
+
+def stop_watcher() -> None:
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher.join(timeout=10)
+        _watcher = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the versioned routing rules.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="print a stored version as JSON")
+    show.add_argument("--version", type=int, help="default the latest")
+    pub = sub.add_parser("publish", help="store a JSON rules file as the next version")
+    pub.add_argument("path")
+    pub.add_argument("--note")
+    args = parser.parse_args()
+
+    from ..database import engine
+    from ..migrations import upgrade
+
+    upgrade(engine)
+    with SessionLocal() as db:
+        seed_defaults(db)
+        if args.command == "show":
+            row = latest(db) if args.version is None else db.get(models.RuleSetVersion, args.version)
+            if row is None:
+                parser.error(f"no rules version {args.version}")
+            print(json.dumps({"version": row.id, "note": row.note, **json.loads(row.rules)}, indent=2))
+        else:
+            with open(args.path, encoding="utf-8") as f:
+                data = json.load(f)
+            try:
+                rule_set = publish(db, data, args.note)
+            except ValueError as e:
+                parser.error(str(e))
+            print(f"rules version {rule_set.version} ({rule_set.checksum[:8]})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Full-text search over feedback messages.
+
+SQLite uses an external-content FTS5 table (``feedback_fts``) kept in step
+with ``feedback`` by triggers; Postgres uses a generated ``tsvector`` column
+with a GIN index. Both are maintained by the database itself, so every
+write path (single, batch, bulk ingest, edits) stays searchable. Other
+databases, or SQLite builds without FTS5, fall back to unranked LIKE.
+"""
+from __future__ import annotations
+import base64
+import json
+import re
+from typing import List, Tuple
+from sqlalchemy import Float, Integer, and_, inspect, literal, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from .. import models
+from .pagination import feedback_query
+
+FTS_TABLE = "feedback_fts"
+TSV_COLUMN = "message_tsv"
+TSV_INDEX = "ix_feedback_message_tsv"
+SCORE_KEY = "search_score"
+
+_TERM = re.compile(r"[^\W_]+\*?")
+
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        message, content='feedback', content_rowid='id', tokenize='porter unicode61')""",
+    f"""CREATE TRIGGER IF NOT EXISTS feedback_fts_ai AFTER INSERT ON feedback BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, message) VALUES (new.id, new.message);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS feedback_fts_ad AFTER DELETE ON feedback BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, message) VALUES ('delete', old.id, old.message);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS feedback_fts_au AFTER UPDATE OF message ON feedback BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, message) VALUES ('delete', old.id, old.message);
+        INSERT INTO {FTS_TABLE}(rowid, message) VALUES (new.id, new.message);
+    END""",
+]
+_SQLITE_TRIGGERS = {"feedback_fts_ai", "feedback_fts_ad", "feedback_fts_au"}
+
+_POSTGRES_DDL = [
+    f"""ALTER TABLE feedback ADD COLUMN IF NOT EXISTS {TSV_COLUMN} tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', coalesce(message, ''))) STORED""",
+    f"CREATE INDEX IF NOT EXISTS {TSV_INDEX} ON feedback USING GIN ({TSV_COLUMN})",
+]
+
+_backend: dict = {}
+
+def ensure_index(engine: Engine) -> str:
+    """
+    Create the search index if missing and return the backend in use:
+    "fts5", "tsvector" or "like". On SQLite the FTS table is rebuilt from
+    ``feedback`` whenever its triggers had to be (re)created, which covers
+    both a first upgrade and a ``feedback`` table that was dropped and
+    recreated.
+    """
+    backend = "like"
+    if engine.dialect.name == "sqlite":
+        try:
+            with engine.begin() as conn:
+                rows = conn.exec_driver_sql(
+                    "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'feedback'"
+                )
+                stale = not _SQLITE_TRIGGERS <= {r[0] for r in rows}
+                for ddl in _SQLITE_DDL:
+                    conn.exec_driver_sql(ddl)
+                if stale:
+                    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            backend = "fts5"
+        except OperationalError:
+            # SQLite compiled without FTS5
+            pass
+    elif engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for ddl in _POSTGRES_DDL:
+                conn.exec_driver_sql(ddl)
+        backend = "tsvector"
+    _backend[engine.url] = backend
+    return backend
+
+def backend_for(engine: Engine) -> str:
+    if engine.url not in _backend:
+        if engine.dialect.name == "sqlite":
+            found = inspect(engine).has_table(FTS_TABLE)
+            _backend[engine.url] = "fts5" if found else "like"
+        elif engine.dialect.name == "postgresql":
+            cols = {c["name"] for c in inspect(engine).get_columns("feedback")}
+            _backend[engine.url] = "tsvector" if TSV_COLUMN in cols else "like"
+        else:
+            _backend[engine.url] = "like"
+    return _backend[engine.url]
+
+def parse_terms(q: str) -> List[str]:
+    """Words of the query; a trailing ``*`` marks a prefix term."""
+    return _TERM.findall(q or "")
+
+def _fts5_query(terms: List[str]) -> str:
+    # Quote every term so FTS5 operators typed by users are taken literally
+    return " ".join(f'"{t.rstrip("*")}"' + ("*" if t.endswith("*") else "") for t in terms)
+
+def _tsquery(terms: List[str]) -> str:
+    return " & ".join(t.rstrip("*").lower() + (":*" if t.endswith("*") else "") for t in terms)
+
+def _hits(backend: str, terms: List[str]):
+    """(id, score) of every matching row; lower scores rank first."""
+    if backend == "fts5":
+        stmt = text(
+            f"SELECT rowid AS id, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q"
+        ).bindparams(q=_fts5_query(terms))
+    elif backend == "tsvector":
+        stmt = text(
+            f"SELECT id, -ts_rank_cd({TSV_COLUMN}, to_tsquery('english', :q)) AS score "
+            f"FROM feedback WHERE {TSV_COLUMN} @@ to_tsquery('english', :q)"
+        ).bindparams(q=_tsquery(terms))
+    else:
+        fb = models.Feedback
+        like = [fb.message.ilike(f"%{t.rstrip('*')}%") for t in terms]
+        return select(fb.id.label("id"), literal(0.0, Float).label("score")).where(and_(*like)).subquery("hits")
+    return stmt.columns(id=Integer, score=Float).subquery("hits")
+
+def encode_cursor(score: float, fb_id: int) -> str:
+    raw = json.dumps([score, fb_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, fb_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(score), int(fb_id)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+def search_page(db: Session, q: str, cursor: str | None, limit: int, fields: List[str] | None = None, **filters):
+    """
+    One page of rows matching every term of ``q``, best match first (ties
+    newest first), plus the cursor for the next page. The equality filters
+    of feedback_query() apply. ValueError on an empty query or bad cursor.
+    Scores depend on corpus statistics, so pages fetched across heavy
+    writes may shift slightly.
+    """
+    terms = parse_terms(q)
+    if not terms:
+        raise ValueError("empty query")
+    fb = models.Feedback
+    hits = _hits(backend_for(db.get_bind()), terms)
+    query = (
+        feedback_query(db, fields, **filters)
+        .join(hits, hits.c.id == fb.id)
+        .add_columns(hits.c.score.label(SCORE_KEY))
+    )
+    if cursor:
+        score, fb_id = decode_cursor(cursor)
+        query = query.filter(or_(hits.c.score > score, and_(hits.c.score == score, fb.id < fb_id)))
+    rows = query.order_by(hits.c.score, fb.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, SCORE_KEY), last.id)
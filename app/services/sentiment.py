@@ -1,42 +1,100 @@
 from __future__ import annotations
-from typing import Dict
-import re
-
-# Try TextBlob; fall back gracefully if not installed
-try:
-    from textblob import TextBlob
-    _HAS_TEXTBLOB = True
-except Exception:
-    _HAS_TEXTBLOB = False
-
-# Lightweight keyword lexicon
-NEG_CUES = {
-    "not good", "not studying", "not studing", "bad", "poor",
-    "dirty", "smell", "smelly", "issue", "problem", "broken",
-    "delay", "late", "bully", "harass", "unsafe", "hygine", "hygiene",
-    "no water", "water issue", "no wifi", "wifi issue",
-}
-POS_CUES = {"excellent", "very good", "good", "great", "thanks", "thank you", "helpful"}
+from typing import Dict, List, Sequence
+import os
+import threading
+
+from . import rules
+from .lexicon import NEG_CUES, POS_CUES, scan  # noqa: F401  (cue sets re-exported)
+from .nlp_cache import sentiment_cache
+
+# TextBlob (and NLTK under it) is imported on the first scored message rather
+# than at startup; rule scoring alone is used if it is not installed.
+_TextBlob = None
+_textblob_lock = threading.Lock()
+
+def _textblob():
+    global _TextBlob
+    if _TextBlob is None:
+        with _textblob_lock:
+            if _TextBlob is None:
+                try:
+                    from textblob import TextBlob
+                    _TextBlob = TextBlob
+                except Exception:
+                    _TextBlob = False
+    return _TextBlob or None
 
 def _rule_polarity(text: str) -> float:
     """Very small rule scorer for very short or typo'd texts."""
-    t = " " + re.sub(r"\s+", " ", text.lower()).strip() + " "
-    score = 0.0
-    for k in POS_CUES:
-        if k in t:
-            score += 0.6
-    for k in NEG_CUES:
-        if k in t:
-            score -= 0.8
-    # Flip if negation patterns present
-    if " not " in t and any(p in t for p in [" good", " fine", " ok", " studying", " working"]):
-        score -= 0.5
-    return max(-1.0, min(1.0, score))
+    lexicon = rules.active().lexicon
+    return lexicon.polarity(lexicon.cached_scan(text))
+
+# "rules" blends the cue lexicon with TextBlob. "linear" scores with the
+# hashed n-gram model in sentiment_model.py (numpy, loaded on first use) and
+# falls back to rules when numpy or the model file is missing.
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "rules").strip().lower()
+
+class RuleBackend:
+    name = "rules"
+
+    def score_batch(self, texts: Sequence[str]) -> List[Dict[str, float | str]]:
+        return [_score_sentiment(t) for t in texts]
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def backend():
+    """The active backend: anything with ``name`` and ``score_batch(texts)``
+    returning one {label, score, confidence} per text."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _load_backend(SENTIMENT_BACKEND)
+    return _backend
+
+def _load_backend(name: str):
+    if name == "linear":
+        try:
+            from .sentiment_model import HashedLinearModel
+            return HashedLinearModel.load()
+        except (ImportError, OSError, ValueError) as e:
+            print(f"⚠️ Sentiment model unavailable ({e}); using rule scoring")
+    return RuleBackend()
+
+def set_backend(new) -> None:
+    """Swap the backend; cached scores from the old one are dropped."""
+    global _backend
+    with _backend_lock:
+        _backend = new
+    sentiment_cache.clear()
 
 def score_sentiment(text: str) -> Dict[str, float | str]:
     """
     Returns: {label, score, confidence}
+
+    Memoised on the normalized text (per rule set, since the rule backend
+    scores with its cues), so messages that differ only in case or spacing
+    share one score.
     """
+    generation = rules.active().generation
+    key = scan(text).norm
+    return dict(sentiment_cache.get_or_compute((generation, key), lambda: backend().score_batch([key])[0]))
+
+def score_sentiment_many(texts: Sequence[str]) -> List[Dict[str, float | str]]:
+    """score_sentiment for a batch: cache misses are scored in one backend call."""
+    generation = rules.active().generation
+    keys = [(generation, scan(t).norm) for t in texts]
+    score_batch = backend().score_batch
+    return [
+        dict(out)
+        for out in sentiment_cache.get_or_compute_many(keys, lambda missing: score_batch([k for _, k in missing]))
+    ]
+
+# Pipeline.run_many uses this for whole batches
+score_sentiment.many = score_sentiment_many
+
+def _score_sentiment(text: str) -> Dict[str, float | str]:
     text = (text or "").strip()
     score = 0.0
     conf = 0.35  # base
@@ -47,7 +105,8 @@ def score_sentiment(text: str) -> Dict[str, float | str]:
     conf = max(conf, 0.55 if abs(r) >= 0.4 else 0.35)
 
     # Blend with TextBlob if available
-    if _HAS_TEXTBLOB and text:
+    TextBlob = _textblob() if text else None
+    if TextBlob is not None:
         try:
             tb = TextBlob(text)
             tb_score = float(tb.sentiment.polarity or 0.0)
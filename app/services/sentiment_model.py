@@ -0,0 +1,201 @@
+"""
+Hashed n-gram linear sentiment model (SENTIMENT_BACKEND=linear).
+
+Features are the words, word bigrams and character 3-5-grams of each
+word, so "hostl hygine" and transliterated Hindi still share most
+features with the spellings seen in training. Each feature is hashed
+with CRC32 into one of ``buckets`` rows of a float32 weight array, whose
+last row is the bias. The array is saved with ``np.save`` next to a small
+JSON file and opened with ``mmap_mode="r"``: nothing is parsed at start
+and every worker process shares the same pages.
+
+A batch is scored with one sparse-by-dense product (CSR feature rows
+times the weights) and a softmax over the labels.
+
+    python -m app.services.sentiment_model app/data/sentiment_seed.tsv --holdout 0.2
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .nlp_cache import normalize
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+DEFAULT_PATH = os.path.join(DATA_DIR, "sentiment_linear")
+MODEL_PATH = os.getenv("SENTIMENT_MODEL_PATH", DEFAULT_PATH)
+
+LABELS = ("negative", "neutral", "positive")
+DEFAULT_BUCKETS = 1 << 15
+CHAR_NGRAMS = (3, 5)
+
+_TOKEN = re.compile(r"\w+")
+_MASK = 0xFFFFFFFF
+
+def tokens(text: str) -> List[str]:
+    return _TOKEN.findall(normalize(text))
+
+@lru_cache(maxsize=50_000)
+def _word_hashes(word: str, char_ngrams: Tuple[int, int]) -> Tuple[int, Tuple[int, ...]]:
+    """32-bit hashes of the word and of its character n-grams. Parents'
+    vocabulary is small, so nearly every word after warm-up is a hit."""
+    padded = f"<{word}>"
+    lo, hi = char_ngrams
+    grams = tuple(
+        zlib.crc32(padded[i:i + n].encode())
+        for n in range(lo, hi + 1) for i in range(len(padded) - n + 1)
+    )
+    return zlib.crc32(f"w:{word}".encode()), grams
+
+def feature_hashes(text: str, char_ngrams: Tuple[int, int] = CHAR_NGRAMS) -> List[int]:
+    """32-bit hashes of the words, word bigrams and character n-grams."""
+    hashed = [_word_hashes(w, char_ngrams) for w in tokens(text)]
+    words = [h for h, _ in hashed]
+    out = words + [((a * 1_000_003) ^ b) & _MASK for a, b in zip(words, words[1:])]
+    for _, grams in hashed:
+        out += grams
+    return out
+
+def feature_matrix(texts: Sequence[str], buckets: int, char_ngrams: Tuple[int, int] = CHAR_NGRAMS):
+    """
+    CSR parts of the batch's feature matrix: (offsets, columns, values).
+    Rows are L2-normalised so long messages do not outvote short ones.
+    """
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    hashes: List[int] = []
+    for i, text in enumerate(texts):
+        hashes += feature_hashes(text, char_ngrams)
+        offsets[i + 1] = len(hashes)
+    counts = np.diff(offsets)
+    values = np.repeat(1.0 / np.sqrt(np.maximum(counts, 1)), counts).astype(np.float32)
+    return offsets, np.asarray(hashes, dtype=np.int64) % buckets, values
+
+def _sparse_dot(offsets: np.ndarray, cols: np.ndarray, values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """(CSR matrix) @ weights[:-1] + bias, for weights of shape (buckets + 1, labels)."""
+    n = len(offsets) - 1
+    out = np.zeros((n, weights.shape[1]), dtype=np.float32)
+    nonempty = np.flatnonzero(np.diff(offsets))
+    if len(cols):
+        contrib = weights[cols] * values[:, None]
+        out[nonempty] = np.add.reduceat(contrib, offsets[nonempty], axis=0)
+    return out + weights[-1]
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    z = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return z / z.sum(axis=1, keepdims=True)
+
+class HashedLinearModel:
+    name = "linear"
+
+    def __init__(self, weights: np.ndarray, labels: Sequence[str] = LABELS,
+                 char_ngrams: Tuple[int, int] = CHAR_NGRAMS):
+        if weights.ndim != 2 or weights.shape[1] != len(labels):
+            raise ValueError(f"weights of shape {weights.shape} do not match labels {list(labels)}")
+        self.weights = weights
+        self.labels = tuple(labels)
+        self.buckets = weights.shape[0] - 1
+        self.char_ngrams = tuple(char_ngrams)
+        self._neg = self.labels.index("negative")
+        self._pos = self.labels.index("positive")
+
+    @classmethod
+    def load(cls, path: str | None = None) -> "HashedLinearModel":
+        """Open ``path``.npy memory-mapped, with settings from ``path``.json
+        (default SENTIMENT_MODEL_PATH, else the model shipped in app/data)."""
+        path = path or MODEL_PATH
+        with open(f"{path}.json") as f:
+            meta = json.load(f)
+        weights = np.load(f"{path}.npy", mmap_mode="r")
+        if weights.shape[0] != meta["buckets"] + 1:
+            raise ValueError(f"{path}.npy has {weights.shape[0]} rows, expected {meta['buckets'] + 1}")
+        return cls(weights, meta["labels"], tuple(meta["char_ngrams"]))
+
+    def save(self, path: str, **meta) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.save(f"{path}.npy", np.ascontiguousarray(self.weights, dtype=np.float32))
+        with open(f"{path}.json", "w") as f:
+            json.dump({"labels": list(self.labels), "buckets": self.buckets,
+                       "char_ngrams": list(self.char_ngrams), **meta}, f, indent=2)
+            f.write("\n")
+
+    def probabilities(self, texts: Sequence[str]) -> np.ndarray:
+        return _softmax(_sparse_dot(*feature_matrix(texts, self.buckets, self.char_ngrams), self.weights))
+
+    def score_batch(self, texts: Sequence[str]) -> List[Dict[str, float | str]]:
+        """{label, score, confidence} per text; score is P(positive) - P(negative)."""
+        if not texts:
+            return []
+        probs = self.probabilities(texts)
+        best = probs.argmax(axis=1)
+        scores = probs[:, self._pos] - probs[:, self._neg]
+        return [
+            {"label": self.labels[b], "score": round(float(s), 3), "confidence": round(float(p[b]), 3)}
+            for b, s, p in zip(best, scores, probs)
+        ]
+
+def train(texts: Sequence[str], labels: Sequence[str], buckets: int = DEFAULT_BUCKETS,
+          epochs: int = 1500, lr: float = 8.0, l2: float = 1e-4) -> HashedLinearModel:
+    """Softmax regression by full-batch gradient descent (the seed set is small)."""
+    offsets, cols, values = feature_matrix(texts, buckets)
+    rows = np.repeat(np.arange(len(texts)), np.diff(offsets))
+    target = np.zeros((len(texts), len(LABELS)), dtype=np.float32)
+    target[np.arange(len(texts)), [LABELS.index(y) for y in labels]] = 1.0
+    weights = np.zeros((buckets + 1, len(LABELS)), dtype=np.float32)
+    for _ in range(epochs):
+        error = (_softmax(_sparse_dot(offsets, cols, values, weights)) - target) / len(texts)
+        grad = l2 * weights
+        np.add.at(grad, cols, values[:, None] * error[rows])
+        grad[-1] += error.sum(axis=0)
+        weights -= lr * grad
+    return HashedLinearModel(weights)
+
+def read_tsv(path: str) -> Tuple[List[str], List[str]]:
+    """``label<TAB>text`` per line."""
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                label, text = line.rstrip("\n").split("\t", 1)
+                if label not in LABELS:
+                    raise ValueError(f"unknown label {label!r} in {path}")
+                labels.append(label)
+                texts.append(text)
+    return texts, labels
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the hashed n-gram sentiment model.")
+    parser.add_argument("data", help="label<TAB>text file")
+    parser.add_argument("--out", default=DEFAULT_PATH, help="output path without extension")
+    parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS)
+    parser.add_argument("--epochs", type=int, default=1500)
+    parser.add_argument("--holdout", type=float, default=0.0,
+                        help="first report accuracy on this fraction held out, then train on everything")
+    args = parser.parse_args()
+
+    texts, labels = read_tsv(args.data)
+    if args.holdout:
+        from .sentiment import RuleBackend
+
+        order = list(range(len(texts)))
+        random.Random(0).shuffle(order)
+        cut = int(len(order) * args.holdout)
+        test, fit = order[:cut], order[cut:]
+        model = train([texts[i] for i in fit], [labels[i] for i in fit], args.buckets, args.epochs)
+        for backend in (model, RuleBackend()):
+            predicted = backend.score_batch([texts[i] for i in test])
+            correct = sum(p["label"] == labels[i] for p, i in zip(predicted, test))
+            print(f"{backend.name:<7} held-out accuracy {correct}/{len(test)} = {correct / len(test):.2f}")
+
+    model = train(texts, labels, args.buckets, args.epochs)
+    model.save(args.out, examples=len(texts), source=os.path.basename(args.data))
+    print(f"wrote {args.out}.npy ({model.weights.nbytes // 1024} KiB) and {args.out}.json")
+
+if __name__ == "__main__":
+    main()
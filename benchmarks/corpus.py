@@ -0,0 +1,61 @@
+"""
+Synthetic but realistic parent messages for benchmarks: greetings, one or
+more complaints or compliments drawn from every department, typos, and
+filler, at a range of lengths. Deterministic for a given seed, so runs on
+different commits see the same corpus.
+"""
+import random
+from typing import List
+
+OPENERS = [
+    "Dear Sir/Madam,", "Respected sir,", "Hello,", "Hi team,", "Good morning,", "", "",
+]
+ISSUES = [
+    "there has been no water in the hostel since yesterday morning",
+    "the hostel room is very dirty and the warden is not responding",
+    "mess food quality is poor and my son fell sick",
+    "the bus is late every day and students miss the first lecture",
+    "shuttle service from the station is not available on weekends",
+    "scholarship payment is delayed for three months",
+    "fees refund for the dropped course is still pending",
+    "exam schedule is confusing and clashes with the lab project",
+    "professor has not uploaded the syllabus or assignment grades",
+    "portal login fails and password reset email never arrives",
+    "wifi in the library and hostel is not working since last week",
+    "my daughter feels harassed by seniors and is under stress",
+    "the clinic doctor was not available during the emergency",
+    "medical insurance claim form is not accepted by the hospital",
+    "hostl hygine is bad and the bathrooms smell",
+    "URGENT: power cut in the dorm for two days, unsafe at night",
+]
+PRAISE = [
+    "thank you for the quick help with the admission documents",
+    "the counselling team was very helpful",
+    "great job on the orientation programme, very good experience",
+]
+FILLER = [
+    "we have already complained twice", "kindly look into this matter",
+    "please resolve this as soon as possible", "my ward is in second year",
+    "this has been going on for a while", "other parents are facing the same issue",
+]
+CLOSERS = ["Regards.", "Thanks.", "Thank you.", "", ""]
+
+def message(rng: random.Random, sentences: int) -> str:
+    parts = [rng.choice(OPENERS)]
+    for _ in range(sentences):
+        roll = rng.random()
+        pool = PRAISE if roll < 0.15 else FILLER if roll < 0.4 else ISSUES
+        parts.append(rng.choice(pool).capitalize() + ".")
+    parts.append(rng.choice(CLOSERS))
+    return " ".join(p for p in parts if p)
+
+def messages(n: int, seed: int = 7, sizes=(1, 2, 4, 8)) -> List[str]:
+    """n messages cycling through the given sentence counts."""
+    rng = random.Random(seed)
+    return [message(rng, sizes[i % len(sizes)]) for i in range(n)]
+
+def payloads(n: int, seed: int = 7) -> List[dict]:
+    return [
+        {"parent_name": f"Parent {i}", "parent_email": f"parent{i}@example.com", "message": m}
+        for i, m in enumerate(messages(n, seed))
+    ]
@@ -0,0 +1,159 @@
+"""
+In-process load generator for the submit and listing paths.
+
+    python -m benchmarks.loadgen --out load.json
+    python -m benchmarks.loadgen --out load.json --compare load_main.json
+
+Drives the real app through httpx's ASGI transport (no sockets, no
+server process) at each concurrency level and records p50/p95/p99
+latency and throughput per scenario. The JSON report carries the git
+commit, so runs on different commits can be compared with --compare.
+Uses a fresh SQLite file unless --url is given.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.corpus import payloads  # noqa: E402
+
+SCENARIOS = ("submit_form", "api_create", "api_list")
+DEFAULT_LEVELS = "1,4,16,64"
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+def _commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=ROOT).returncode != 0
+        return out.stdout.strip() + ("-dirty" if dirty else "")
+    except OSError:
+        return "unknown"
+
+def _request(client, scenario: str, payload: dict):
+    if scenario == "submit_form":
+        return client.post("/submit", data=payload)
+    if scenario == "api_create":
+        return client.post("/api/feedback", json=payload)
+    return client.get("/api/feedback", params={"limit": 50})
+
+async def run_level(client, scenario: str, concurrency: int, requests: int, corpus: List[dict]) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            started = time.perf_counter()
+            r = await _request(client, scenario, corpus[i % len(corpus)])
+            latencies.append(time.perf_counter() - started)
+            if r.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ms = sorted(v * 1000 for v in latencies)
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ms) / elapsed, 1),
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(ms[-1], 2) if ms else 0.0,
+    }
+
+async def run(levels: List[int], requests: int, scenarios: List[str]) -> Dict:
+    import httpx
+    from app.main import app
+
+    corpus = payloads(500, seed=3)
+    results: Dict[str, Dict[str, Dict]] = {}
+    # httpx's ASGI transport does not send lifespan events
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadgen") as client:
+            # seed rows for the listing scenario and warm caches/imports
+            await run_level(client, "api_create", 4, 100, corpus)
+            for scenario in scenarios:
+                results[scenario] = {}
+                for c in levels:
+                    stats = await run_level(client, scenario, c, requests, corpus)
+                    results[scenario][str(c)] = stats
+                    print(
+                        f"{scenario:<12} c={c:<4} {stats['throughput_rps']:>8.1f} req/s  "
+                        f"p50 {stats['p50_ms']:>8.2f}  p95 {stats['p95_ms']:>8.2f}  "
+                        f"p99 {stats['p99_ms']:>8.2f} ms  errors {stats['errors']}"
+                    )
+    finally:
+        await app.router.shutdown()
+    return results
+
+def compare(report: Dict, baseline: Dict) -> None:
+    print(f"\nvs {baseline['meta']['commit']}: throughput and p95 change")
+    for scenario, levels in report["results"].items():
+        for c, stats in levels.items():
+            old = baseline.get("results", {}).get(scenario, {}).get(c)
+            if not old:
+                continue
+            rps = (stats["throughput_rps"] / old["throughput_rps"] - 1) * 100 if old["throughput_rps"] else 0.0
+            p95 = (stats["p95_ms"] / old["p95_ms"] - 1) * 100 if old["p95_ms"] else 0.0
+            print(f"{scenario:<12} c={c:<4} req/s {rps:>+7.1f}%  p95 {p95:>+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="DATABASE_URL (default: a fresh SQLite file)")
+    parser.add_argument("--levels", default=DEFAULT_LEVELS, help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=400, help="requests per scenario and level")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--out", default="bench_load.json")
+    parser.add_argument("--compare", help="earlier report to diff against")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.url or f"sqlite:///{Path(tempfile.mkdtemp(prefix='loadgen-')) / 'load.db'}"
+    levels = [int(c) for c in args.levels.split(",") if c.strip()]
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run(levels, args.requests, scenarios))
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "requests_per_level": args.requests,
+        },
+        "results": results,
+    }
+    Path(args.out).write_text(json.dumps(report, indent=2))
+    print(f"wrote {args.out}")
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+if __name__ == "__main__":
+    main()
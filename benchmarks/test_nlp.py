@@ -0,0 +1,68 @@
+"""
+Microbenchmarks of the classification path.
+
+    pytest benchmarks --benchmark-json=bench_nlp.json
+    pytest benchmarks --benchmark-compare          # against the last saved run
+
+Each round scores a fixed corpus of 100 messages of one length. "cold"
+clears the sentiment/category caches before every round (new messages),
+"warm" scores the same corpus again (repeated messages).
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.services import nlp_cache  # noqa: E402
+from app.services.categorizer import categorize, priority_from  # noqa: E402
+from app.services.routing_agent import run_agent  # noqa: E402
+from app.services.sentiment import score_sentiment  # noqa: E402
+from benchmarks.corpus import messages  # noqa: E402
+
+CORPUS_SIZE = 100
+LENGTHS = {"short": (1,), "medium": (4,), "long": (16,)}
+
+@pytest.fixture(scope="module", params=list(LENGTHS))
+def corpus(request):
+    return messages(CORPUS_SIZE, seed=11, sizes=LENGTHS[request.param])
+
+def _run(benchmark, fn, texts, cache):
+    def once():
+        for t in texts:
+            fn(t)
+    if cache == "cold":
+        benchmark.pedantic(once, setup=nlp_cache.clear_caches, rounds=10, iterations=1)
+    else:
+        once()
+        benchmark(once)
+
+@pytest.mark.parametrize("cache", ["cold", "warm"])
+def test_score_sentiment(benchmark, corpus, cache):
+    _run(benchmark, score_sentiment, corpus, cache)
+
+@pytest.mark.parametrize("cache", ["cold", "warm"])
+def test_categorize(benchmark, corpus, cache):
+    _run(benchmark, categorize, corpus, cache)
+
+def test_priority_from(benchmark, corpus):
+    args = []
+    for t in corpus:
+        cat = categorize(t)
+        args.append((score_sentiment(t)["label"], int(cat["hits"]), t, cat["category"]))
+    benchmark(lambda: [priority_from(*a) for a in args])
+
+@pytest.mark.parametrize("cache", ["cold", "warm"])
+def test_run_agent(benchmark, corpus, cache):
+    payloads = [{"message": t} for t in corpus]
+    _run(benchmark, run_agent, payloads, cache)
+
+@pytest.mark.parametrize("backend", ["rules", "linear"])
+def test_sentiment_backend_batch(benchmark, corpus, backend):
+    """One score_batch call over the corpus, no cache."""
+    from app.services.sentiment import RuleBackend
+    if backend == "linear":
+        pytest.importorskip("numpy")
+        from app.services.sentiment_model import HashedLinearModel
+        scorer = HashedLinearModel.load()
+    else:
+        scorer = RuleBackend()
+    benchmark(scorer.score_batch, corpus)
@@ -0,0 +1,53 @@
+"""Per-message categorize() latency against message length.
+
+    python scripts/bench_categorizer.py
+
+Compares the compiled KeywordMatcher with the original per-category
+difflib scan kept in tests/_legacy_categorizer.py.
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tests"))
+
+from _legacy_categorizer import legacy_categorize  # noqa: E402
+from app.services.categorizer import CATEGORY_KEYWORDS, categorize  # noqa: E402
+
+LENGTHS = [5, 20, 50, 100, 250, 500, 1000]
+SAMPLES = 20
+
+def corpus(n_words, rng):
+    vocab = [v for words in CATEGORY_KEYWORDS.values() for v in words]
+    filler = (
+        "dear sir madam my son daughter has been facing a serious problem with the "
+        "since last week we requested many times please look into this matter"
+    ).split()
+    out = []
+    for _ in range(SAMPLES):
+        words = [rng.choice(vocab) if rng.random() < 0.15 else rng.choice(filler) for _ in range(n_words)]
+        # sprinkle unseen words so the token cache does not hide fuzzy cost
+        words += [f"word{rng.randrange(10**6)}" for _ in range(n_words // 10)]
+        out.append(" ".join(words))
+    return out
+
+def per_message_ms(fn, texts):
+    start = time.perf_counter()
+    for t in texts:
+        fn(t)
+    return (time.perf_counter() - start) * 1000 / len(texts)
+
+def main():
+    rng = random.Random(42)
+    print(f"{'words':>6} {'legacy ms':>10} {'compiled ms':>12} {'speedup':>8}")
+    for n in LENGTHS:
+        texts = corpus(n, rng)
+        legacy = per_message_ms(legacy_categorize, texts)
+        compiled = per_message_ms(categorize, texts)
+        print(f"{n:>6} {legacy:>10.3f} {compiled:>12.3f} {legacy / compiled:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
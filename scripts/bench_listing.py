@@ -0,0 +1,134 @@
+"""Seed the feedback table and record query plans and latency for the
+listing endpoints.
+
+    python scripts/bench_listing.py --url sqlite:///./bench.db --rows 1000000
+    python scripts/bench_listing.py --url postgresql+psycopg2://... --rows 1000000
+
+Each endpoint is called through the real app; every SELECT it issues
+against ``feedback`` is captured and EXPLAINed (EXPLAIN QUERY PLAN on
+SQLite, EXPLAIN ANALYZE elsewhere). Results go to a JSON file.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+DEPARTMENTS = ["Hostel", "Academics", "Finance", "Transport", "Health", "Counselling", "IT Support", "Student Affairs"]
+ENDPOINTS = [
+    ("api_list", "/api/feedback"),
+    ("api_list_dept_status", "/api/feedback?department=Hostel&status=new"),
+    ("api_list_sentiment", "/api/feedback?sentiment=negative"),
+    ("admin_list_dept_status", "/feedback?department=Hostel&status=in_progress"),
+    ("department_cards", "/feedback/department/{dept_id}"),
+    ("api_search_selective", "/api/feedback/search?q=123457"),
+    ("api_search", "/api/feedback/search?q=water+hostel"),
+    ("api_search_status", "/api/feedback/search?q=scholarship+delayed&status=new"),
+    ("api_search_prefix", "/api/feedback/search?q=harass*&limit=20"),
+]
+PHRASES = [
+    "no water in the hostel", "hostel room is dirty", "bus is late every morning",
+    "scholarship payment delayed", "fees refund pending", "exam schedule is confusing",
+    "wifi not working in library", "canteen food quality is poor", "thank you for the quick help",
+    "my child feels harassed by seniors", "counselling session was helpful", "lab equipment broken",
+]
+
+
+def seed(engine, rows, chunk=20_000):
+    from sqlalchemy import func, insert, select
+    from app import models
+
+    with engine.begin() as conn:
+        have = conn.execute(select(func.count()).select_from(models.Feedback)).scalar()
+    rng = random.Random(1)
+    start = datetime(2020, 1, 1)
+    fb = models.Feedback.__table__
+    t0 = time.perf_counter()
+    for offset in range(have, rows, chunk):
+        batch = []
+        for i in range(offset, min(rows, offset + chunk)):
+            dept = rng.choice(DEPARTMENTS)
+            batch.append({
+                "parent_name": f"Parent {i}", "parent_email": f"p{i}@example.com",
+                "message": f"{rng.choice(PHRASES)} and {rng.choice(PHRASES)} ({i})", "channel": "web",
+                "sentiment": rng.choice(["positive", "neutral", "negative"]),
+                "sentiment_score": 0.0, "sentiment_confidence": 0.5,
+                "category": dept, "priority": rng.choice(["low", "medium", "high"]),
+                "department": dept,
+                "status": rng.choices(["new", "in_progress", "resolved"], [2, 1, 7])[0],
+                "created_at": start + timedelta(seconds=i * 60),
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(fb), batch)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    return max(0, rows - have), time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="sqlite:///./bench.db")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default="bench_listing.json")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.url
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.database import engine
+    from app.main import app
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM feedback" in statement:
+            captured.append((statement, parameters))
+
+    report = {"url": engine.url.render_as_string(hide_password=True), "dialect": engine.dialect.name, "endpoints": {}}
+    with TestClient(app) as client:
+        inserted, seconds = seed(engine, args.rows)
+        report["seeded"] = {"rows": args.rows, "inserted": inserted, "seconds": round(seconds, 2)}
+        with engine.connect() as conn:
+            dept_id = conn.exec_driver_sql("SELECT id FROM departments WHERE name = 'Hostel'").scalar()
+
+        for name, path in ENDPOINTS:
+            path = path.format(dept_id=dept_id)
+            timings = []
+            for _ in range(args.repeat):
+                captured.clear()
+                event.listen(engine, "before_cursor_execute", capture)
+                t0 = time.perf_counter()
+                r = client.get(path)
+                timings.append((time.perf_counter() - t0) * 1000)
+                event.remove(engine, "before_cursor_execute", capture)
+                r.raise_for_status()
+            plans = []
+            prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN ANALYZE "
+            with engine.connect() as conn:
+                for statement, params in captured:
+                    rows = conn.exec_driver_sql(prefix + statement, params).fetchall()
+                    plans.append({"sql": statement, "plan": [" ".join(str(c) for c in row) for row in rows]})
+            report["endpoints"][name] = {
+                "path": path,
+                "bytes": len(r.content),
+                "ms_median": round(statistics.median(timings), 2),
+                "ms_max": round(max(timings), 2),
+                "plans": plans,
+            }
+            print(f"{name:<24} {statistics.median(timings):>10.2f} ms")
+            for p in plans:
+                for line in p["plan"]:
+                    print(f"    {line}")
+
+    Path(args.out).write_text(json.dumps(report, indent=2))
+    print(f"wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Per-message overhead of the agent's native pipeline vs the LangChain chain.
+
+    python scripts/bench_pipeline.py
+
+Both run the same sentiment/category stages and _combine. Caches are warmed
+first, so stage cost is a cache lookup and the difference is dispatch
+overhead. The "noop" rows swap in constant stages to isolate it completely.
+"""
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.services import routing_agent  # noqa: E402
+from app.services.pipeline import Pipeline  # noqa: E402
+
+MESSAGES = [
+    "Exam schedule is delayed and confusing",
+    "URGENT: no water in hostel since morning",
+    "thank you, the counselling team was very helpful",
+    "bus is late every day and fees refund pending",
+]
+ROUNDS = 250
+
+def _sent(message):
+    return {"label": "neutral", "score": 0.0, "confidence": 0.35}
+
+def _cat(message):
+    return {"category": "General", "department": "Student Affairs", "hits": 0}
+
+def per_message_us(fn):
+    payloads = [{"message": m} for m in MESSAGES]
+    for p in payloads:
+        fn(p)
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for p in payloads:
+            fn(p)
+    return (time.perf_counter() - start) * 1e6 / (ROUNDS * len(payloads))
+
+def compare(label, pipe):
+    chain = routing_agent._build_chain(pipe)
+    native = per_message_us(lambda p: pipe.run(p["message"]))
+    langchain = per_message_us(chain.invoke)
+    print(f"{label:>8} {native:>10.1f} {langchain:>13.1f} {langchain / native:>7.1f}x")
+
+def main():
+    print(f"{'stages':>8} {'native us':>10} {'langchain us':>13} {'ratio':>8}")
+    compare("agent", routing_agent.pipeline)
+    compare("noop", Pipeline({"sentiment": _sent, "category": _cat}, routing_agent._combine))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Per-message CPU time of the rule scorers' text handling.
+
+    python scripts/bench_rules.py
+
+"per-scorer" is what run_agent did for each message before the shared
+pass (tests/_legacy_rules.py): normalize for the sentiment cache key,
+normalize and scan again in _rule_polarity, normalize for the category
+cache key, and lowercase and scan once more in priority_from. "shared"
+is one lexicon scan whose result all three use. TextBlob and keyword
+matching are the same either way and are left out.
+"""
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tests"))
+
+from _legacy_rules import legacy_has_urgency, legacy_normalize, legacy_rule_polarity  # noqa: E402
+from app.services import rules  # noqa: E402
+from benchmarks.corpus import messages  # noqa: E402
+
+SIZES = {"short": (1,), "medium": (4,), "long": (16,)}
+N = 2000
+ROUNDS = 5
+
+def per_scorer(text):
+    key = legacy_normalize(text)
+    legacy_rule_polarity(key)
+    legacy_normalize(text)
+    return legacy_has_urgency(text)
+
+def shared(text):
+    lexicon = rules.active().lexicon
+    found = lexicon.scan(text)
+    lexicon.polarity(found)
+    return found.urgent
+
+def per_message_us(fn, texts):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6 / len(texts)
+
+def main():
+    print(f"{'length':>7} {'chars':>6} {'per-scorer us':>14} {'shared us':>10} {'speedup':>8}")
+    for name, sizes in SIZES.items():
+        texts = messages(N, seed=11, sizes=sizes)
+        chars = sum(map(len, texts)) // len(texts)
+        old, new = per_message_us(per_scorer, texts), per_message_us(shared, texts)
+        print(f"{name:>7} {chars:>6} {old:>14.2f} {new:>10.2f} {old / new:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
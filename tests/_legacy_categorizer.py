@@ -0,0 +1,21 @@
+"""The original per-category difflib scan, shared by the equivalence test
+and scripts/bench_categorizer.py."""
+from app.services.categorizer import CATEGORY_KEYWORDS, DEFAULT_DEPARTMENT, _approx_hit, _tokens
+
+def legacy_categorize(text):
+    words = _tokens(text)
+    joined = " ".join(words)
+    best_cat, best_hits = None, 0
+    for cat, vocab in CATEGORY_KEYWORDS.items():
+        hits = 0
+        for phrase in [v for v in vocab if " " in v]:
+            if phrase in joined:
+                hits += 2
+        for w in words:
+            if _approx_hit(w, [v for v in vocab if " " not in v]):
+                hits += 1
+        if hits > best_hits:
+            best_hits, best_cat = hits, cat
+    best_cat = best_cat or "General"
+    department = best_cat if best_cat in CATEGORY_KEYWORDS else DEFAULT_DEPARTMENT
+    return {"category": best_cat, "department": department, "hits": best_hits}
@@ -0,0 +1,27 @@
+"""The original per-scorer normalization and cue scans, shared by the
+equivalence test and scripts/bench_rules.py."""
+import re
+
+from app.services.lexicon import NEG_CUES, POS_CUES, URGENCY_WORDS
+
+_WS = re.compile(r"\s+")
+
+def legacy_normalize(text):
+    return _WS.sub(" ", (text or "").lower()).strip()
+
+def legacy_rule_polarity(text):
+    t = " " + re.sub(r"\s+", " ", text.lower()).strip() + " "
+    score = 0.0
+    for k in POS_CUES:
+        if k in t:
+            score += 0.6
+    for k in NEG_CUES:
+        if k in t:
+            score -= 0.8
+    if " not " in t and any(p in t for p in [" good", " fine", " ok", " studying", " working"]):
+        score -= 0.5
+    return max(-1.0, min(1.0, score))
+
+def legacy_has_urgency(text):
+    t = " " + (text or "").lower() + " "
+    return any(k in t for k in URGENCY_WORDS)
@@ -0,0 +1,19 @@
+import os
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway SQLite file before app.database is imported
+_tmpdir = tempfile.mkdtemp(prefix="feedback-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.database import Base, engine
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as c:
+        yield c
@@ -1,6 +1,8 @@
+import pytest
 from app.services.sentiment import score_sentiment
 from app.services.categorizer import categorize, priority_from
-from app.services.routing_agent import run_agent
+from app.services import routing_agent
+from app.services.routing_agent import run_agent, run_agent_batch
 
 def test_sentiment_posneg():
     assert score_sentiment("This is great and helpful")["label"] == "positive"
@@ -16,3 +18,156 @@ def test_agent():
     assert out["category"] in {"Academics", "General"}
     assert out["sentiment"] in {"negative","neutral","positive"}
     assert out["priority"] in {"low","medium","high"}
+
+def test_agent_batch_matches_single():
+    payloads = [
+        {"message": "Exam schedule is delayed and confusing"},
+        {"message": "   "},
+        {},
+        {"message": "URGENT: no water in hostel since morning"},
+        {"message": "thank you, the counselling team was very helpful"},
+    ] * 3
+    expected = [run_agent(p) for p in payloads]
+    assert run_agent_batch(payloads, workers=1) == expected
+
+def test_agent_batch_process_pool(monkeypatch):
+    monkeypatch.setattr(routing_agent, "BATCH_POOL_THRESHOLD", 4)
+    monkeypatch.setattr(routing_agent, "BATCH_CHUNK_SIZE", 3)
+    payloads = [{"message": f"bus {i} is late and fees refund pending"} for i in range(10)]
+    try:
+        assert run_agent_batch(payloads, workers=2) == [run_agent(p) for p in payloads]
+    finally:
+        routing_agent.shutdown_pool()
+
+def test_nlp_cache_normalized_hits():
+    from app.services import nlp_cache
+
+    nlp_cache.clear_caches()
+    before = nlp_cache.sentiment_cache.stats()
+    first = score_sentiment("Thank   you, very helpful")
+    assert score_sentiment("thank you, VERY helpful ") == first
+    after = nlp_cache.sentiment_cache.stats()
+    assert after["hits"] - before["hits"] == 1
+    assert categorize("No  WATER in hostel") == categorize("no water in hostel")
+
+def test_lru_cache_evicts_oldest():
+    from app.services.nlp_cache import LRUCache
+
+    cache = LRUCache("t", maxsize=2, ttl=0)
+    for key in ("a", "b", "a", "c"):
+        cache.get_or_compute(key, lambda: key.upper())
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (1, 3, 1, 2)
+    assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+
+def test_linear_sentiment_backend(monkeypatch, tmp_path):
+    pytest.importorskip("numpy")
+    from app.services import nlp_cache, sentiment
+    from app.services.sentiment_model import HashedLinearModel
+
+    model = HashedLinearModel.load()
+    assert type(model.weights).__name__ == "memmap"
+    texts = ["hostl hygine bahut kharab hai", "thnx for the quick help", "what is the fee deadline", ""]
+    batch = model.score_batch(texts)
+    assert batch == [model.score_batch([t])[0] for t in texts]
+    assert [b["label"] for b in batch[:2]] == ["negative", "positive"]
+    assert all(set(b) == {"label", "score", "confidence"} and -1 <= b["score"] <= 1 for b in batch)
+
+    monkeypatch.setattr(sentiment, "_backend", None)
+    monkeypatch.setattr(sentiment, "SENTIMENT_BACKEND", "linear")
+    try:
+        nlp_cache.clear_caches()
+        assert sentiment.backend().name == "linear"
+        misses = nlp_cache.sentiment_cache.stats()["misses"]
+        many = sentiment.score_sentiment_many(["Thnx for the quick help", texts[0], "thnx for the QUICK help"])
+        assert many == [batch[1], batch[0], batch[1]]
+        assert sentiment.score_sentiment(texts[0]) == batch[0]
+        assert nlp_cache.sentiment_cache.stats()["misses"] - misses == 2
+
+        monkeypatch.setattr("app.services.sentiment_model.MODEL_PATH", str(tmp_path / "missing"))
+        sentiment.set_backend(None)
+        assert sentiment.backend().name == "rules"
+    finally:
+        sentiment.set_backend(None)
+
+def test_shared_scan_matches_per_scorer_rules():
+    import random
+    from _legacy_rules import legacy_has_urgency, legacy_normalize, legacy_rule_polarity
+    from app.services import lexicon
+    from app.services.nlp_cache import normalize
+    from app.services.sentiment import _rule_polarity
+
+    rng = random.Random(5)
+    cues = sorted(lexicon.POS_CUES | lexicon.NEG_CUES | lexicon.URGENCY_WORDS) + ["not", "fine", "ok", "working"]
+    filler = "my son the related chocolate is very today week please".split()
+    spaces = [" ", " ", " ", "  ", "\t", "\n", "\u00a0", "\u2003"]
+    samples = ["", "   ", "NO\tWATER", "no  water!!", "Not good", "POWER\ncut", " not ok "]
+    for _ in range(400):
+        words = [rng.choice(cues + filler) for _ in range(rng.randint(1, 12))]
+        text = "".join(w.upper() if rng.random() < 0.2 else w + rng.choice(spaces) for w in words)
+        samples.append(text if rng.random() < 0.5 else " " + text)
+    lexicon.clear()
+    for text in samples:
+        assert normalize(text) == legacy_normalize(text), repr(text)
+        assert _rule_polarity(text) == legacy_rule_polarity(text), repr(text)
+        assert priority_from("neutral", 0, text, "General") == ("high" if legacy_has_urgency(text) else "low"), repr(text)
+        # the cached entry for the normalized text answers for that text
+        norm = lexicon.scan(text).norm
+        assert lexicon.scan(norm).urgent == legacy_has_urgency(norm), repr(text)
+
+def _word_count(message):
+    return {"word_count": len(message.split())}
+
+def test_pipeline_extra_stage(monkeypatch):
+    from app.services.pipeline import Pipeline
+
+    pipe = Pipeline(routing_agent.pipeline.stages, routing_agent.pipeline.combine)
+    monkeypatch.setattr(routing_agent, "pipeline", pipe)
+    payload = {"message": "URGENT: no water in hostel since morning"}
+    base = run_agent(payload)
+    routing_agent.register_stage("words", _word_count)
+    assert run_agent(payload) == {**base, "word_count": 7}
+    assert run_agent_batch([payload, {}], workers=1)[0]["word_count"] == 7
+
+def test_langchain_backend_matches_native(monkeypatch):
+    pytest.importorskip("langchain_core")
+    payloads = [
+        {"message": "Exam schedule is delayed and confusing"},
+        {"message": "thank you, the counselling team was very helpful"},
+    ]
+    native = [run_agent(p) for p in payloads]
+    monkeypatch.setattr(routing_agent, "AGENT_BACKEND", "langchain")
+    monkeypatch.setattr(routing_agent, "_chain", None)
+    assert routing_agent._get_chain() is not None
+    assert [run_agent(p) for p in payloads] == native
+
+def test_rule_set_swaps_are_atomic_per_message(monkeypatch):
+    from app.services import rules
+
+    custom = rules.defaults()
+    custom = {**custom, "category_keywords": {**custom["category_keywords"], "Library": ["library", "books"]}}
+    message = "library books missing"
+    assert run_agent({"message": message})["category"] != "Library"
+
+    # Rules published while a message is being classified: it is redone
+    # under the new set rather than mixing the two
+    real_run = routing_agent.pipeline.run
+    def run_during_swap(msg):
+        out = real_run(msg)
+        if rules.active().version is None:
+            rules.install(rules.RuleSet(7, custom))
+        return out
+    monkeypatch.setattr(routing_agent.pipeline, "run", run_during_swap)
+    try:
+        out = run_agent({"message": message})
+        assert (out["category"], out["rules_version"]) == ("Library", 7)
+        monkeypatch.undo()
+
+        # Pool workers classify with the parent's rule set
+        monkeypatch.setattr(routing_agent, "BATCH_POOL_THRESHOLD", 2)
+        monkeypatch.setattr(routing_agent, "BATCH_CHUNK_SIZE", 2)
+        outs = run_agent_batch([{"message": message}] * 4, workers=2)
+        assert {(o["category"], o["rules_version"]) for o in outs} == {("Library", 7)}
+    finally:
+        routing_agent.shutdown_pool()
+        rules.reset()
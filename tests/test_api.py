@@ -0,0 +1,386 @@
+def _submit(client, n, message="The bus is late again"):
+    payloads = [
+        {"parent_name": f"Parent {i}", "parent_email": f"p{i}@example.com", "message": message}
+        for i in range(n)
+    ]
+    r = client.post("/api/feedback/batch", json=payloads)
+    assert r.status_code == 200
+    return r.json()
+
+def test_list_feedback_keyset_pages(client):
+    created = _submit(client, 7)
+    seen, cursor = [], None
+    for _ in range(10):
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/api/feedback", params=params)
+        assert r.status_code == 200
+        seen += [f["id"] for f in r.json()]
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+        # inserts between pages must not shift the walk
+        _submit(client, 1)
+    else:
+        raise AssertionError(f"cursor did not terminate; saw {seen}")
+    assert seen == sorted((f["id"] for f in created), reverse=True)
+
+def test_list_feedback_fields_projection(client):
+    _submit(client, 2)
+    r = client.get("/api/feedback", params={"fields": "id,department"})
+    assert r.status_code == 200
+    assert all(set(row) == {"id", "department"} for row in r.json())
+    assert client.get("/api/feedback", params={"fields": "id,nope"}).status_code == 400
+    assert client.get("/api/feedback", params={"cursor": "garbage"}).status_code == 400
+
+def test_feedback_batch_limit(client):
+    from app.routers import feedback as feedback_router
+    payload = {"parent_name": "P", "parent_email": "p@example.com", "message": "hi"}
+    max_len = feedback_router.MAX_BATCH_SIZE
+    assert client.post("/api/feedback/batch", json=[payload] * (max_len + 1)).status_code == 422
+
+def test_export_streams_ndjson_and_csv(client):
+    import csv
+    import io
+    import json
+
+    created = _submit(client, 3)
+    _submit(client, 1, message="fees refund pending")
+
+    r = client.get("/api/feedback/export", params={"format": "ndjson", "department": "Transport"})
+    assert r.status_code == 200
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["id"] for row in rows] == [f["id"] for f in created]
+
+    r = client.get("/api/feedback/export", params={"format": "csv"})
+    assert r.headers["content-type"].startswith("text/csv")
+    table = list(csv.DictReader(io.StringIO(r.text)))
+    assert len(table) == 4 and table[-1]["department"] == "Finance"
+
+    assert "x-export-watermark" in r.headers
+    r = client.get("/api/feedback/export", params={"since": "2999-01-01T00:00:00"})
+    assert r.text == ""
+    # since is inclusive, also for whole-second SQLite timestamps
+    r = client.get("/api/feedback/export", params={"since": created[0]["created_at"]})
+    assert len(r.text.splitlines()) == 4
+
+def test_deferred_analysis_queue(client, monkeypatch):
+    from app.database import SessionLocal
+    from app.services import analysis_queue
+    from app.services.routing_agent import run_agent
+
+    monkeypatch.setattr(analysis_queue, "DEFERRED_ANALYSIS", True)
+    message = "URGENT: no water in the hostel since morning"
+    r = client.post("/api/feedback", json={"parent_name": "P", "parent_email": "p@example.com", "message": message})
+    assert r.json()["status"] == "pending_analysis"
+    assert client.get("/api/analysis/queue").json()["depth"] == 1
+
+    db = SessionLocal()
+    try:
+        assert analysis_queue.process_pending(db) == 1
+    finally:
+        db.close()
+    row = client.get("/api/feedback").json()[0]
+    expected = run_agent({"message": message})
+    assert row["status"] == "new"
+    assert {k: row[k] for k in expected} == expected
+    assert client.get("/api/analysis/queue").json()["depth"] == 0
+    totals = client.get("/api/analytics/summary").json()["totals"]
+    assert totals["status"] == {"new": 1} and totals["department"] == {"Hostel": 1}
+
+def test_department_registry_invalidated_on_commit(client):
+    from app.database import SessionLocal
+    from app.models import Department
+    from app.services.departments import registry
+
+    names = [d["name"] for d in client.get("/api/departments").json()]
+    assert "Library" not in names and names == sorted(names)
+
+    db = SessionLocal()
+    try:
+        db.add(Department(name="Library"))
+        db.commit()
+        assert registry.id_for("Library", db) is not None
+    finally:
+        db.close()
+    assert "Library" in [d["name"] for d in client.get("/api/departments").json()]
+
+def test_analytics_summary_tracks_inserts_and_status(client):
+    created = _submit(client, 2)
+    _submit(client, 1, message="fees refund pending")
+    client.post(f"/feedback/{created[0]['id']}/status", data={"status": "resolved"})
+
+    r = client.get("/api/analytics/summary", params={"bucket": "week"})
+    assert r.status_code == 200
+    totals = r.json()["totals"]
+    assert totals["department"] == {"Transport": 2, "Finance": 1}
+    assert totals["status"] == {"new": 2, "resolved": 1}
+    assert len(r.json()["series"]) == 1
+    assert client.get("/api/analytics/summary", params={"dimensions": "colour"}).status_code == 400
+
+def test_admin_pages_paginate_with_fragments(client):
+    created = _submit(client, 5)
+    r = client.get("/feedback", params={"limit": 2, "department": "Transport"})
+    assert r.status_code == 200
+    assert "5 feedback entries found" in r.text
+    assert f"#{created[-1]['id']}<" in r.text and f"#{created[0]['id']}<" not in r.text
+    assert "/feedback/rows?" in r.text
+
+    rows, cursor = [], None
+    for _ in range(5):
+        params = {"limit": 2, "department": "Transport"}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/feedback/rows", params=params)
+        rows.append(r.text.count("<tr>"))
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert rows == [2, 2, 1]
+
+    dept_id = created[0]["department_id"]
+    r = client.get(f"/feedback/department/{dept_id}", params={"limit": 3})
+    assert "5 assignments" in r.text and r.text.count('class="card-item"') == 3
+    r = client.get(f"/feedback/department/{dept_id}/cards", params={"limit": 3})
+    assert r.headers.get("x-next-cursor")
+
+def test_search_ranked_filtered_and_paged(client):
+    _submit(client, 2, "The hostel water supply is broken")
+    _submit(client, 1, "water water everywhere in the hostel, water leaking from the ceiling")
+    _submit(client, 3, "Library timings are too short")
+    r = client.get("/api/feedback/search", params={"q": "hostel water"})
+    assert r.status_code == 200
+    found = r.json()
+    assert len(found) == 3 and "everywhere" in found[0]["message"]
+
+    # stemmed and prefix terms, combined with the listing filters
+    assert len(client.get("/api/feedback/search", params={"q": "leak"}).json()) == 1
+    assert len(client.get("/api/feedback/search", params={"q": "libr*"}).json()) == 3
+    target = found[1]["id"]
+    client.post(f"/feedback/{target}/status", data={"status": "resolved"})
+    resolved = client.get("/api/feedback/search", params={"q": "water", "status": "resolved"}).json()
+    assert [f["id"] for f in resolved] == [target]
+
+    seen, cursor = [], None
+    for _ in range(5):
+        params = {"q": "water", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/api/feedback/search", params=params)
+        seen += [f["id"] for f in r.json()]
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert seen == [f["id"] for f in found]
+    assert client.get("/api/feedback/search", params={"q": "\"*"}).status_code == 400
+
+def test_near_duplicates_share_a_cluster(client):
+    outage = [
+        "URGENT: no water in the hostel since morning",
+        "No water in hostel since morning, please fix urgent",
+        "no water in the hostel since this morning!!",
+    ]
+    ids = [_submit(client, 1, m)[0]["cluster_id"] for m in outage]
+    other = _submit(client, 1, "Exam schedule is delayed and confusing")[0]["cluster_id"]
+    assert ids[0] is not None and ids == [ids[0]] * 3 and other != ids[0]
+
+    batch = _submit(client, 4, "There is no water in the hostel since morning")
+    assert {f["cluster_id"] for f in batch} == {ids[0]}
+
+    clusters = client.get("/api/clusters", params={"department": "Hostel"}).json()
+    assert [(c["id"], c["size"]) for c in clusters] == [(ids[0], 7)]
+    assert client.get(f"/api/clusters/{other}").json()["size"] == 1
+    assert client.get("/api/clusters/999999").status_code == 404
+    members = client.get("/api/feedback", params={"cluster_id": ids[0], "fields": "id,cluster_id"}).json()
+    assert len(members) == 7
+
+def test_metrics_exposition(client):
+    from app.services import metrics
+
+    _submit(client, 2)
+    client.post("/api/feedback", json={"parent_name": "P", "parent_email": "p@example.com", "message": "Hostel wifi is down"})
+    client.get("/feedback")
+    r = client.get("/metrics")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    assert 'http_request_duration_seconds_count{method="POST",route="/api/feedback",status="200"}' in body
+    assert 'route="/api/feedback/batch"' in body
+    for stage in ("sentiment", "category", "combine"):
+        assert f'agent_stage_duration_seconds_count{{stage="{stage}"}}' in body
+    for stage in ("classify", "department_lookup", "cluster", "insert", "commit", "total"):
+        assert f'feedback_create_stage_duration_seconds_count{{stage="{stage}"}}' in body
+    assert 'template_render_duration_seconds_count{template="feedback_list.html"}' in body
+    assert 'feedback_classifications_total{category="Transport",priority=' in body
+    assert 'db_pool_connections{state="checkedout"}' in body
+
+    hist = metrics.Histogram("t_seconds", "test", ("k",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(v, "a")
+    lines = list(hist.render())
+    assert 't_seconds_bucket{k="a",le="0.1"} 2' in lines
+    assert 't_seconds_bucket{k="a",le="+Inf"} 4' in lines
+    assert hist.count("a") == 4
+
+def test_admin_views_conditional_get(client, monkeypatch):
+    from datetime import timedelta
+    from app.services import http_cache
+
+    created = _submit(client, 3)
+    # a change within the last second is never cached
+    assert "etag" not in client.get("/feedback").headers
+
+    monkeypatch.setattr(http_cache, "SETTLE", timedelta(0))
+    r = client.get("/feedback", params={"status": "new"})
+    etag, last_modified = r.headers["etag"], r.headers["last-modified"]
+    again = client.get("/feedback", params={"status": "new"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert client.get("/feedback", params={"status": "new"}, headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/feedback/rows", headers={"If-None-Match": etag}).status_code == 200
+
+    client.post(f"/feedback/{created[0]['id']}/status", data={"status": "resolved"})
+    r = client.get("/feedback", params={"status": "new"}, headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+
+    assert client.get("/").text == client.get("/").text
+
+def test_department_events_push_created_and_status(client, monkeypatch):
+    import asyncio
+    from app.main import _render_event
+    from app.services import events
+
+    monkeypatch.setattr(events, "_broker", events.LocalBroker(queue_size=2))
+    department = _submit(client, 1)[0]["department"]
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        with events.broker().subscribe(department) as sub, events.broker().subscribe("Elsewhere") as other:
+            # writes happen on other threads, as they do under the threadpool
+            fb = (await loop.run_in_executor(None, _submit, client, 1))[0]
+            created = await sub.get(5)
+            await loop.run_in_executor(
+                None, lambda: client.post(f"/feedback/{fb['id']}/status", data={"status": "Completed"})
+            )
+            status = await sub.get(5)
+            assert await other.get(0.05) is None
+            for i in range(3):
+                events.publish_status(department, [i], "x")
+            overflow = [await sub.get(1), await sub.get(0.05)]
+        assert events.broker().subscribers(department) == 0
+        return fb, created, status, overflow
+
+    fb, created, status, overflow = asyncio.run(scenario())
+    assert created["feedback"]["id"] == fb["id"]
+    assert f'data-id="{fb["id"]}"' in _render_event(created)
+    assert status == {"type": "status", "ids": [fb["id"]], "status": "Completed"}
+    # a subscriber that falls behind is told to reload instead
+    assert overflow == [events.RESET, None]
+    assert client.get("/feedback/department/999999/events").status_code == 404
+
+def test_bulk_status_update(client):
+    from datetime import datetime, timedelta, timezone
+
+    transport = [f["id"] for f in _submit(client, 3)]
+    fees = [f["id"] for f in _submit(client, 2, message="fees refund pending")]
+    patch = lambda **body: client.patch("/api/feedback/status", json=body)
+
+    assert patch(status="resolved").status_code == 400
+    r = patch(status="resolved", ids=transport[:2])
+    assert r.status_code == 200 and r.json() == {"status": "resolved", "updated": transport[:2], "conflicts": []}
+    # overlapping request: rows already resolved are not counted twice
+    assert patch(status="resolved", ids=transport).json()["updated"] == transport[2:]
+
+    # rows created or changed after the client read them are conflicts
+    read_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    r = patch(status="in_progress", category="Finance", unmodified_since=read_at.isoformat())
+    assert r.json() == {"status": "in_progress", "updated": [], "conflicts": fees}
+    read_at = datetime.now(timezone.utc) + timedelta(seconds=2)
+    r = patch(status="in_progress", category="Finance", unmodified_since=read_at.isoformat())
+    assert r.json()["updated"] == fees and r.json()["conflicts"] == []
+
+    totals = client.get("/api/analytics/summary").json()["totals"]
+    assert totals["status"] == {"resolved": 3, "in_progress": 2}
+    listed = client.get("/api/feedback", params={"status": "resolved", "fields": "id,updated_at"}).json()
+    assert sorted(f["id"] for f in listed) == transport and all(f["updated_at"] for f in listed)
+
+def test_rules_publish_and_reclassify(client):
+    from app.database import SessionLocal
+    from app.services import reclassify, rules
+
+    current = client.get("/api/rules").json()
+    assert current["version"] == 1 and "Hostel" in current["category_keywords"]
+    old = _submit(client, 2, message="library books missing")
+    assert {(f["category"], f["rules_version"]) for f in old} == {("General", 1)}
+    other = _submit(client, 1)[0]
+
+    body = {k: current[k] for k in ("category_keywords", "urgency_words", "pos_cues", "neg_cues")}
+    body["category_keywords"]["Library"] = ["Library", "books"]
+    try:
+        assert client.post("/api/rules", json={**body, "urgency_words": [""]}).status_code == 422
+        r = client.post("/api/rules", params={"reclassify": "false"}, json={**body, "note": "add library"})
+        assert r.status_code == 201
+        assert (r.json()["version"], r.json()["category_keywords"]["Library"]) == (2, ["library", "books"])
+        # republishing the rules in effect adds no version
+        assert client.post("/api/rules", params={"reclassify": "false"}, json=body).json()["version"] == 2
+
+        new = _submit(client, 1, message="library books missing")[0]
+        assert (new["category"], new["rules_version"]) == ("Library", 2)
+
+        with SessionLocal() as db:
+            job_id = reclassify.create(db, "stale", chunk_size=2).id
+        done = reclassify.run(job_id, workers=1, duty=1, log=lambda m: None)
+        assert (done["status"], done["scanned"], done["changed"]) == ("done", 3, 2)
+        rows = {f["id"]: f for f in client.get("/api/feedback").json()}
+        assert {(rows[f["id"]]["category"], rows[f["id"]]["rules_version"]) for f in old} == {("Library", 2)}
+        # same outputs under the new rules: only the version is recorded
+        assert (rows[other["id"]]["rules_version"], rows[other["id"]]["updated_at"]) == (2, None)
+        totals = client.get("/api/analytics/summary").json()["totals"]
+        assert totals["category"]["Library"] == 3 and "General" not in totals["category"]
+    finally:
+        rules.reset()
+
+def test_reclassify_job_resumes_after_failure(client, monkeypatch):
+    import time
+    import pytest
+    from app.database import SessionLocal
+    from app.services import nlp_cache, reclassify, routing_agent
+
+    bus = [f["id"] for f in _submit(client, 3)]
+    fees = [f["id"] for f in _submit(client, 2, message="fees refund pending")]
+    assert client.post("/api/reclassify", json={"scope": "some"}).status_code == 422
+
+    # A heuristics change: late buses become high priority
+    real_priority = routing_agent.priority_from
+    monkeypatch.setattr(routing_agent, "priority_from",
+                        lambda s, h, text, c: "high" if "bus" in text else real_priority(s, h, text, c))
+    nlp_cache.clear_caches()
+
+    # The second chunk fails; the first one's writes and checkpoint stay
+    real_batch, calls = reclassify.run_agent_batch, []
+    def flaky(payloads, workers=None):
+        calls.append(len(payloads))
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        return real_batch(payloads, workers=workers)
+    monkeypatch.setattr(reclassify, "run_agent_batch", flaky)
+    with SessionLocal() as db:
+        job_id = reclassify.create(db, "all", chunk_size=2).id
+    with pytest.raises(RuntimeError):
+        reclassify.run(job_id, workers=1, duty=1, log=lambda m: None)
+    job = client.get(f"/api/reclassify/{job_id}").json()
+    assert (job["status"], job["last_id"], job["scanned"], job["changed"]) == ("failed", bus[1], 2, 2)
+
+    r = client.post(f"/api/reclassify/{job_id}/resume")
+    assert r.status_code == 202
+    for _ in range(100):
+        job = client.get(f"/api/reclassify/{job_id}").json()
+        if job["status"] != "running":
+            break
+        time.sleep(0.05)
+    assert (job["status"], job["last_id"], job["scanned"], job["changed"]) == ("done", fees[-1], 5, 3)
+    assert client.post(f"/api/reclassify/{job_id}/resume").status_code == 409
+
+    rows = {f["id"]: f for f in client.get("/api/feedback").json()}
+    assert {rows[i]["priority"] for i in bus} == {"high"}
+    # unchanged rows are not rewritten
+    assert all(rows[i]["updated_at"] is None for i in fees)
+    totals = client.get("/api/analytics/summary").json()["totals"]
+    assert totals["priority"]["high"] == 3 and sum(totals["priority"].values()) == 5
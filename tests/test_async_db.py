@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+def test_async_service_create_and_page(tmp_path):
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.database import Base
+    from app.services import pagination
+    from app.services.feedback_service import create_feedback_service_async
+    from app.services.routing_agent import run_agent
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+        message = "Bus shuttle is always late"
+        async with Session() as db:
+            fb = await create_feedback_service_async(
+                {"parent_name": "P", "parent_email": "p@example.com", "message": message}, db, defer=False
+            )
+            rows, next_cursor = await db.run_sync(lambda s: pagination.feedback_page(s, None, 10))
+        await engine.dispose()
+        return fb, rows, next_cursor, run_agent({"message": message})
+
+    fb, rows, next_cursor, expected = asyncio.run(scenario())
+    assert fb.id and fb.created_at is not None
+    assert fb.category == expected["category"] and fb.priority == expected["priority"]
+    assert [r.id for r in rows] == [fb.id] and next_cursor is None
+
+def test_async_database_url_mapping(monkeypatch):
+    from app.database import async_database_url
+
+    monkeypatch.delenv("ASYNC_DATABASE_URL", raising=False)
+    assert async_database_url("sqlite:///./feedback.db") == "sqlite+aiosqlite:///./feedback.db"
+    assert async_database_url("postgresql+psycopg2://u@h/db") == "postgresql+asyncpg://u@h/db"
@@ -0,0 +1,39 @@
+import random
+
+from _legacy_categorizer import legacy_categorize
+from app.services.categorizer import CATEGORY_KEYWORDS, KeywordMatcher, _tokens, categorize
+
+def _typo(word, rng):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(len(word))
+    op = rng.choice("dsi")
+    if op == "d":
+        return word[:i] + word[i + 1:]
+    if op == "s":
+        return word[:i] + rng.choice("aeiourst") + word[i + 1:]
+    return word[:i] + rng.choice("aeiourst") + word[i:]
+
+def test_compiled_matcher_matches_reference():
+    rng = random.Random(7)
+    vocab = [v for words in CATEGORY_KEYWORDS.values() for v in words]
+    filler = "my son said the and is very not good please help today week".split()
+    samples = [
+        "The hostel hygiene is poor and water is leaking",
+        "xmess foodie and wifi issues again",
+        "",
+        "!!!",
+    ]
+    for _ in range(300):
+        words = []
+        for _ in range(rng.randint(1, 40)):
+            w = rng.choice(vocab + filler)
+            words.append(_typo(w, rng) if rng.random() < 0.3 else w)
+        samples.append(" ".join(words))
+    for text in samples:
+        assert categorize(text) == legacy_categorize(text), text
+
+def test_phrase_prefixes_counted():
+    m = KeywordMatcher({"A": ["no water", "no water supply"], "B": ["water"]})
+    counts = m.hits(_tokens("There is no water supply"))
+    assert counts == [4, 1]
@@ -0,0 +1,11 @@
+from app.services.clustering import band_keys, features, signature, similarity
+
+def test_minhash_estimates_jaccard():
+    a = features("no water in the hostel since morning, urgent")
+    b = features("urgent: no water in hostel since yesterday morning")
+    jaccard = len(a & b) / len(a | b)
+    sa, sb = signature(a), signature(b)
+    assert abs(similarity(sa, sb) - jaccard) < 0.2
+    assert similarity(sa, signature(features("the library wifi login portal is down"))) < 0.2
+    # identical word sets share every band; signatures are stable across calls
+    assert band_keys(sa) == band_keys(signature(set(a)))
@@ -0,0 +1,35 @@
+import csv
+import json
+
+from app import ingest
+
+def _write_csv(path, n):
+    with path.open("w", newline="") as fh:
+        w = csv.DictWriter(fh, fieldnames=["parent_name", "parent_email", "message", "created_at"])
+        w.writeheader()
+        for i in range(n):
+            w.writerow({
+                "parent_name": f"Parent {i}", "parent_email": f"p{i}@example.com",
+                "message": "" if i == 3 else f"hostel water problem {i}",
+                "created_at": "2024-03-0%dT10:00:00Z" % (1 + i % 5),
+            })
+
+def test_ingest_csv_resumes_from_checkpoint(client, tmp_path):
+    src, ckpt = tmp_path / "archive.csv", tmp_path / "archive.ckpt"
+    _write_csv(src, 10)
+
+    dry = ingest.run(src, chunk_size=4, workers=1, checkpoint=ckpt, dry_run=True, log=lambda m: None)
+    assert (dry["written"], dry["skipped"]) == (9, 1) and not ckpt.exists()
+
+    first = ingest.run(src, chunk_size=4, workers=1, offset=0, checkpoint=ckpt, log=lambda m: None)
+    assert first["offset"] == 10 and json.loads(ckpt.read_text()) == {"offset": 10}
+
+    # resuming at the checkpoint writes nothing new
+    again = ingest.run(src, chunk_size=4, workers=1, checkpoint=ckpt, log=lambda m: None)
+    assert again["written"] == 0
+
+    rows = client.get("/api/feedback", params={"fields": "department,created_at"}).json()
+    assert len(rows) == 9 and {r["department"] for r in rows} == {"Hostel"}
+    assert rows[0]["created_at"].startswith("2024-03-05")
+    summary = client.get("/api/analytics/summary", params={"bucket": "day"}).json()
+    assert summary["totals"]["department"] == {"Hostel": 9}
@@ -0,0 +1,30 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.migrations import ensure_columns, ensure_indexes, upgrade
+
+def test_upgrade_adds_indexes_to_existing_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        # feedback as created before the composite indexes and rollups existed
+        conn.execute(text(
+            "CREATE TABLE feedback (id INTEGER PRIMARY KEY, parent_name VARCHAR, parent_email VARCHAR, "
+            "student_id VARCHAR, message TEXT, channel VARCHAR, sentiment VARCHAR, sentiment_score FLOAT, "
+            "sentiment_confidence FLOAT, category VARCHAR, priority VARCHAR, department VARCHAR, "
+            "department_id INTEGER, status VARCHAR, created_at DATETIME DEFAULT CURRENT_TIMESTAMP, "
+            "updated_at DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO feedback (message, category, priority, department, sentiment, status) "
+            "VALUES ('bus late', 'Transport', 'medium', 'Transport', 'negative', 'new')"
+        ))
+    upgrade(engine)
+    names = {ix["name"] for ix in inspect(engine).get_indexes("feedback")}
+    assert {"ix_feedback_created_id", "ix_feedback_dept_status_created", "ix_feedback_cluster_id"} <= names
+    assert "cluster_id" in {c["name"] for c in inspect(engine).get_columns("feedback")}
+    assert ensure_indexes(engine) == []
+    assert ensure_columns(engine) == []
+    with engine.connect() as conn:
+        counts = conn.execute(text(
+            "SELECT bucket, count FROM feedback_rollups WHERE dimension = 'department' AND value = 'Transport'"
+        )).all()
+    assert sorted(counts) == [("day", 1), ("week", 1)]
@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+
+from app.services import routing_agent
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("langchain_core", "textblob", "nltk")
+
+# Generous ceilings: these catch an eager import of the NLP stack creeping
+# back in, not small regressions. Override for slower CI runners.
+IMPORT_BUDGET_SECONDS = float(os.getenv("STARTUP_IMPORT_BUDGET", "5"))
+RSS_BUDGET_MB = float(os.getenv("STARTUP_RSS_BUDGET_MB", "100"))
+
+_PROBE = """
+import json, resource, sys, time
+t = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - t
+try:
+    # Current RSS; ru_maxrss can carry the forking parent's peak over exec
+    with open("/proc/self/status") as f:
+        rss_kb = next(int(l.split()[1]) for l in f if l.startswith("VmRSS:"))
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1)
+print(json.dumps({
+    "import_seconds": elapsed,
+    "rss_mb": rss_kb / 1024,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+def _probe_startup():
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=ROOT, env=dict(os.environ), capture_output=True, text=True, timeout=120, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def test_app_import_is_light(record_property):
+    stats = _probe_startup()
+    record_property("import_seconds", round(stats["import_seconds"], 3))
+    record_property("rss_mb", round(stats["rss_mb"], 1))
+    assert stats["loaded"] == []
+    assert stats["import_seconds"] < IMPORT_BUDGET_SECONDS
+    assert stats["rss_mb"] < RSS_BUDGET_MB
+
+def test_agent_without_langchain(monkeypatch):
+    payloads = [
+        {"message": "Exam schedule is delayed and confusing"},
+        {"message": "URGENT: no water in hostel since morning"},
+        {"message": "thank you, the counselling team was very helpful"},
+    ]
+    expected = [routing_agent.run_agent(p) for p in payloads]
+
+    # A None entry in sys.modules makes the import raise ImportError
+    monkeypatch.setitem(sys.modules, "langchain_core.runnables", None)
+    monkeypatch.setattr(routing_agent, "AGENT_BACKEND", "langchain")
+    monkeypatch.setattr(routing_agent, "_chain", None)
+    assert routing_agent._get_chain() is None
+    assert [routing_agent.run_agent(p) for p in payloads] == expected